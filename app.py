@@ -2,7 +2,7 @@ import os
 import sqlite3
 from flask import Flask
 import config
-from models import init_db, close_db
+from models import init_db, close_db, format_money
 
 
 def create_app():
@@ -23,6 +23,7 @@ def create_app():
 
     # Register teardown
     app.teardown_appcontext(close_db)
+    app.add_template_filter(format_money, "money")
 
     # Register blueprints
     from routes.dashboard import bp as dashboard_bp
@@ -41,6 +42,10 @@ def create_app():
     app.register_blueprint(api_bp)
     app.register_blueprint(templates_bp)
 
+    # Start the background job scheduler (requeues jobs lost to a crash)
+    from jobs import scheduler
+    scheduler.start()
+
     return app
 
 
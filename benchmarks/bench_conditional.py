@@ -0,0 +1,104 @@
+"""
+Benchmark: full re-enrichment vs. conditional re-enrichment.
+
+Starts a local stand-in HTTP server with N fake broker homepages that send
+an ETag and answer If-None-Match with 304. Each site is analyzed once to
+fill the cache, then re-analyzed (as on a monthly refresh) both ways:
+
+  * full        - analyze_website() with no fingerprint: download the whole
+                  page and extract again
+  * conditional - analyze_website() with the stored fingerprint: a 304
+                  skips the body and extraction
+
+--changed sets the share of sites whose page changed in between; they are
+re-downloaded and re-extracted either way.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_conditional --sites 60 --latency 0.05 --changed 0.1
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from enrichment.page_analysis import analyze_website
+
+PAGE = """<html><head><title>{site} Mortgage</title>{scripts}</head><body>
+<nav><a href="/{site}/">Home</a> <a href="/{site}/contact">Contact</a></nav>
+<p>Non-QM lending in Texas. Email us at info@{site}.example-broker.net (v{version})</p>
+<footer><a href="https://www.facebook.com/{site}mortgage">Facebook</a></footer>
+</body></html>"""
+
+
+def make_handler(latency, versions, served):
+    scripts = "<script>var x = '" + "a" * 200_000 + "';</script>"
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            site = self.path.strip("/").split("/")[0]
+            version = versions.get(site, 0)
+            etag = f'"{site}-{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            body = PAGE.format(site=site, scripts=scripts, version=version).encode()
+            served.append(len(body))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def run(urls, fingerprints):
+    start = time.perf_counter()
+    unchanged = sum(analyze_website(url, fingerprints.get(url))["unchanged"] for url in urls)
+    return time.perf_counter() - start, unchanged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--changed", type=float, default=0.1, help="share of sites changed since the last run")
+    args = parser.parse_args()
+
+    versions, served = {}, []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, versions, served))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/s{i}/" for i in range(args.sites)]
+
+    fingerprints = {url: analyze_website(url)["fingerprint"] for url in urls}
+    for i in range(int(args.sites * args.changed)):
+        versions[f"s{i}"] = 1
+    print(f"{args.sites} sites, {args.latency}s latency, {int(args.sites * args.changed)} changed")
+
+    results = {}
+    for name, stored in [("full", {}), ("conditional", fingerprints)]:
+        served.clear()
+        elapsed, unchanged = run(urls, stored)
+        results[name] = elapsed
+        print(f"  {name + ':':13}{elapsed:6.2f}s  ({sum(served) / 1e6:5.1f} MB downloaded, "
+              f"{unchanged} pages skipped as unchanged)")
+
+    print(f"  speedup:     {results['full'] / results['conditional']:6.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
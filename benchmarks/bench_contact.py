@@ -0,0 +1,124 @@
+"""
+Benchmark: fixed contact-path guessing vs. the adaptive contact crawler.
+
+Starts a local stand-in HTTP server with N fake broker sites whose homepage
+has no email. The email lives on a subpage linked from the site's navigation
+under a name that varies by site ("/contact", "/get-in-touch",
+"/about-us", "/our-team"). Every site is then crawled both ways:
+
+  * guessing - the old crawl: /contact, /contact-us, /about, /about-us one
+               after another, sleeping between them, stopping at the first
+               page with any email
+  * crawler  - crawl_contact_pages(): ranks the homepage's own links, fetches
+               the best few at once, stops at a high-scoring email
+
+and reports per-site latency and how many sites' emails were found. The
+crawler's time includes fetching the homepage it reads links from.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_contact --sites 40 --latency 0.2 --delay 0.5
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin
+
+from enrichment.extract import scan_page
+from scrape_emails import CONTACT_PATHS, crawl_contact_pages, extract_emails_from_html, fetch_page
+
+CONTACT_PAGES = ["contact", "get-in-touch", "about-us", "our-team"]
+
+HOME = """<html><body><nav>
+<a href="/{site}/">Home</a> <a href="/{site}/loan-programs">Loan Programs</a>
+<a href="/{site}/apply">Apply</a> <a href="/{site}/{contact}">{label}</a>
+<a href="/{site}/blog">Blog</a></nav>
+<p>Non-QM lending in Texas.</p></body></html>"""
+
+CONTACT = """<html><body><h1>Talk to us</h1>
+<p>Email <a href="mailto:info@{site}.example-broker.net">info@{site}.example-broker.net</a></p>
+</body></html>"""
+
+OTHER = "<html><body><p>Nothing to see here.</p></body></html>"
+
+
+def make_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+            site, _, page = self.path.strip("/").partition("/")
+            contact = CONTACT_PAGES[int(site[1:]) % len(CONTACT_PAGES)]
+            if not page:
+                html = HOME.format(site=site, contact=contact, label=contact.replace("-", " ").title())
+            elif page == contact:
+                html = CONTACT.format(site=site)
+            else:
+                html = OTHER
+            body = html.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def crawl_by_guessing(url, delay):
+    """The old crawl_contact_pages()."""
+    for path in CONTACT_PATHS:
+        sub_html = fetch_page(urljoin(url.rstrip("/") + "/", path.lstrip("/")))
+        if sub_html:
+            emails = extract_emails_from_html(sub_html)
+            if emails:
+                return emails
+        time.sleep(delay)
+    return []
+
+
+def crawl_adaptive(url, delay):
+    return crawl_contact_pages(url, scan_page(fetch_page(url)).hrefs)
+
+
+def run(crawl, urls, delay):
+    found = 0
+    start = time.perf_counter()
+    for url in urls:
+        if crawl(url, delay):
+            found += 1
+    return (time.perf_counter() - start) / len(urls), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.2, help="server latency per request (s)")
+    parser.add_argument("--delay", type=float, default=0.5, help="old sleep between subpages (s)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/s{i}/" for i in range(args.sites)]
+    print(f"{args.sites} sites, {args.latency}s latency")
+
+    results = {}
+    for name, crawl in [("guessing", crawl_by_guessing), ("crawler", crawl_adaptive)]:
+        results[name] = run(crawl, urls, args.delay)
+        per_site, found = results[name]
+        print(f"  {name + ':':10}{per_site:6.2f}s per site  (emails found for {found}/{args.sites})")
+
+    print(f"  speedup:  {results['guessing'][0] / results['crawler'][0]:6.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
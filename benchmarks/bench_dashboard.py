@@ -0,0 +1,82 @@
+"""
+Benchmark: dashboard totals as separate COUNT queries vs. one aggregate.
+
+Uses the synthetic lead database from bench_queries (built on first use)
+and times computing the dashboard totals three ways:
+
+  * separate - the old thirteen queries: one COUNT(*) scan per platform,
+               email and website, plus the outreach_logs and session counts
+  * single   - routes.dashboard.STATS_SQL, one pass over leads
+  * cached   - what a view costs between writes: reading stats_version
+
+and checks the first two agree.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_dashboard --leads 1000000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_queries import build, ensure_contacts
+from models import stats_version
+from routes.dashboard import PLATFORMS, STATS_SQL
+
+
+def separate(conn):
+    def count(sql):
+        return conn.execute(sql).fetchone()[0]
+
+    stats = {
+        "total_leads": count("SELECT COUNT(*) FROM leads"),
+        "leads_with_email": count("SELECT COUNT(*) FROM leads WHERE email != '' AND email IS NOT NULL"),
+        "leads_with_website": count(
+            "SELECT COUNT(*) FROM leads WHERE company_website != '' AND company_website IS NOT NULL"),
+    }
+    for platform in PLATFORMS:
+        stats[platform] = count(f"SELECT COUNT(*) FROM leads WHERE {platform} != '' AND {platform} IS NOT NULL")
+    stats["total_sent"] = count("SELECT COUNT(*) FROM outreach_logs WHERE result = 'sent'")
+    stats["total_skipped"] = count("SELECT COUNT(*) FROM outreach_logs WHERE result = 'skipped'")
+    stats["total_sessions"] = count("SELECT COUNT(*) FROM outreach_sessions")
+    return stats
+
+
+def single(conn):
+    cur = conn.execute(STATS_SQL)
+    return dict(zip([d[0] for d in cur.description], cur.fetchone()))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--db", help="database path (default: bench_queries' file in the temp directory)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.gettempdir(), f"bench_queries_{args.leads}.db")
+    conn = sqlite3.connect(path) if os.path.exists(path) else build(path, args.leads)
+    ensure_contacts(conn)
+    conn.execute("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('stats_version', 0)")
+
+    old, old_stats = timed(separate, conn)
+    new, new_stats = timed(single, conn)
+    cached, _ = timed(stats_version, conn)
+    assert old_stats == new_stats, (old_stats, new_stats)
+
+    print(f"  separate: {old * 1000:9.1f}ms")
+    print(f"  single:   {new * 1000:9.1f}ms  ({old / new:.1f}x)")
+    print(f"  cached:   {cached * 1000:9.3f}ms  ({old / cached:.0f}x)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: exporting leads and loading them back, CSV vs. typed formats.
+
+Uses the synthetic lead database from bench_queries (built on first use)
+and, for the first --rows leads, times writing the export and loading it
+back into typed Python rows, per format:
+
+  * csv     - the /dashboard/export file; loading has to re-parse the
+              "36,088,923"-style volume strings into numbers
+  * ndjson  - exporter.ndjson_chunks over DATASETS["leads"], encoded by
+              SQLite's json_object(); volumes are already integers
+  * parquet - exporter.write_parquet (skipped when pyarrow is missing)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_export --rows 200000
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+import config
+from benchmarks.bench_queries import build
+from exporter import csv_chunks, dataset_sql, fetch_chunks, ndjson_chunks, parquet_available, write_parquet
+
+
+def parse_amount(value):
+    value = value.strip().upper().replace("$", "").replace(",", "")
+    if not value:
+        return None
+    scale = {"M": 1_000_000, "K": 1_000}.get(value[-1], 1)
+    return round(float(value.rstrip("MK")) * scale)
+
+
+def load_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row["volume_export"] = parse_amount(row["volume_export"])
+        row["rank"] = int(row["rank"]) if row["rank"] else None
+    return rows
+
+
+def load_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def load_parquet(path):
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def write(chunks, path):
+    with open(path, "wb") as f:
+        for block in chunks:
+            f.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--db", help="database path (default: bench_queries' file in the temp directory)")
+    args = parser.parse_args()
+
+    config.DATABASE = args.db or os.path.join(tempfile.gettempdir(), f"bench_queries_{args.leads}.db")
+    if not os.path.exists(config.DATABASE):
+        build(config.DATABASE, args.leads).close()
+    conn = sqlite3.connect(config.DATABASE)
+    columns = ", ".join(row[1] for row in conn.execute("PRAGMA table_info(leads)"))
+    conn.close()
+
+    out = tempfile.mkdtemp()
+    where = f"leads.id <= {args.rows}"
+    plain_sql = f"SELECT {columns} FROM leads WHERE {where} ORDER BY rank_num, id"
+    formats = [
+        ("csv", lambda path: write(csv_chunks(fetch_chunks(plain_sql)), path), load_csv),
+        ("ndjson", lambda path: write(ndjson_chunks(fetch_chunks(dataset_sql("leads", where_sql=where, as_json=True))), path),
+         load_ndjson),
+    ]
+    if parquet_available():
+        formats.append(("parquet", lambda path: write_parquet(fetch_chunks(dataset_sql("leads", where_sql=where)),
+                                                              "leads", path), load_parquet))
+
+    print(f"{args.rows:,} leads")
+    print(f"{'format':10}{'export':>10}{'load':>10}{'size':>10}")
+    for name, export, load in formats:
+        path = os.path.join(out, f"leads.{name}")
+        export_time, _ = timed(export, path)
+        load_time, _ = timed(load, path)
+        print(f"{name:10}{export_time:9.2f}s{load_time:9.2f}s{os.path.getsize(path) / 1e6:8.1f}MB")
+    if not parquet_available():
+        print("parquet   (skipped: pyarrow not installed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Benchmark: BeautifulSoup-based extraction vs. the single-pass scanner.
+
+Runs the social + email extractors over a corpus of broker pages both ways:
+
+  * soup    - the old extractors: a full html.parser soup per page for
+              <a href>, then one regex pass per social platform and one
+              for emails
+  * scanner - enrichment.extract.scan_page(): one combined regex pass
+
+and reports pages per second, plus how many pages' results differ.
+
+The corpus is synthetic by default (realistic broker homepages of mixed
+size: nav menus, inline scripts and JSON, share widgets, footers). Point
+--corpus at a directory of saved .html pages to use real ones instead.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_extract --pages 200
+    python -m benchmarks.bench_extract --corpus saved_pages/
+"""
+
+import argparse
+import base64
+import random
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from enrichment.extract import scan_page
+from scrape_emails import EMAIL_REGEX, extract_emails_from_scan, is_junk_email
+from scrape_socials import SOCIAL_PATTERNS, clean_url, extract_socials_from_scan, is_skip_url
+
+NAV_ITEMS = ["Home", "About", "Loan Programs", "Non-QM", "DSCR", "Bank Statement", "Apply", "Calculators",
+             "Team", "Reviews", "Blog", "FAQ", "Contact"]
+
+
+def make_page(rng, i):
+    site = f"broker{i}"
+    parts = [f"<!DOCTYPE html><html><head><title>{site} Mortgage</title>"]
+    parts.append('<link rel="stylesheet" href="https://fonts.googleapis.com/css?family=Roboto">')
+    for _ in range(rng.randint(2, 8)):
+        blob = base64.b64encode(rng.randbytes(rng.randint(2000, 20000))).decode()
+        parts.append(f'<script>window.__DATA__ = {{"img": "data:image/png;base64,{blob}"}};</script>')
+    parts.append("</head><body><header><nav><ul>")
+    for j in range(rng.randint(20, 60)):
+        item = rng.choice(NAV_ITEMS)
+        parts.append(f'<li class="menu-item menu-{j}"><a href="/{item.lower().replace(" ", "-")}/{j}">{item}</a></li>')
+    parts.append("</ul></nav></header><main>")
+    for _ in range(rng.randint(10, 80)):
+        parts.append("<section><h2>Non-QM loans for self-employed borrowers</h2><p>"
+                     + " ".join(rng.choice(NAV_ITEMS).lower() for _ in range(80)) + "</p></section>")
+    if rng.random() < 0.6:
+        parts.append(f'<p>Questions? Email <a href="mailto:info@{site}.com?subject=Hi">info@{site}.com</a></p>')
+    if rng.random() < 0.2:
+        parts.append(f'<a href="mailto:loans&#64;{site}.com">Write us</a>')
+    if rng.random() < 0.3:
+        parts.append(f"<p>Contact jane.doe@{site}-lending.com or noreply@wix.com</p>")
+    parts.append('<div class="share"><a href="https://www.facebook.com/sharer/sharer.php?u=x">Share</a>'
+                 '<a href="https://twitter.com/intent/tweet?text=x">Tweet</a></div>')
+    parts.append("</main><footer>")
+    if rng.random() < 0.8:
+        parts.append(f'<a href="https://www.facebook.com/{site}mortgage/">Facebook</a>')
+    if rng.random() < 0.6:
+        parts.append(f'<a href="https://www.linkedin.com/company/{site}-mortgage">LinkedIn</a>')
+    if rng.random() < 0.4:
+        parts.append(f'<a href="https://instagram.com/{site}.loans">Instagram</a>')
+    if rng.random() < 0.2:
+        parts.append(f'<script>var yt = "https://www.youtube.com/@{site}";</script>')
+    parts.append('<img src="https://www.facebook.com/tr?id=1&ev=PageView" height="1" width="1">')
+    parts.append("</footer></body></html>")
+    return "".join(parts)
+
+
+def load_corpus(args):
+    if args.corpus:
+        paths = sorted(Path(args.corpus).glob("*.htm*"))
+        return [(f"https://{p.stem}.example/", p.read_text(errors="replace")) for p in paths]
+    rng = random.Random(42)
+    return [(f"https://broker{i}.example/", make_page(rng, i)) for i in range(args.pages)]
+
+
+# The extractors as they were before the single-pass scanner
+
+def soup_socials(html, base_url):
+    soup = BeautifulSoup(html, "html.parser")
+    results = {}
+    all_links = set()
+    for tag in soup.find_all("a", href=True):
+        href = tag["href"]
+        if href.startswith("/"):
+            href = urljoin(base_url, href)
+        all_links.add(href)
+    for platform, pattern in SOCIAL_PATTERNS.items():
+        all_links.update(re.findall(pattern["regex"], html, re.IGNORECASE))
+    for link in sorted(all_links):
+        if is_skip_url(link):
+            continue
+        link_lower = link.lower()
+        for platform, pattern in SOCIAL_PATTERNS.items():
+            if platform in results:
+                continue
+            if any(domain in link_lower for domain in pattern["domains"]):
+                results[platform] = clean_url(link)
+    return results, soup
+
+
+def soup_emails(html, soup):
+    emails = set()
+    for tag in soup.find_all("a", href=True):
+        href = tag["href"]
+        if href.lower().startswith("mailto:"):
+            raw = href[7:].split("?")[0].strip()
+            if EMAIL_REGEX.match(raw):
+                emails.add(raw.lower())
+    for match in EMAIL_REGEX.findall(html):
+        emails.add(match.lower())
+    return [e for e in emails if not is_junk_email(e)]
+
+
+def run_soup(corpus):
+    out = []
+    for url, html in corpus:
+        socials, soup = soup_socials(html, url)
+        out.append((socials, soup_emails(html, soup)))
+    return out
+
+
+def run_scanner(corpus):
+    out = []
+    for url, html in corpus:
+        scan = scan_page(html)
+        out.append((extract_socials_from_scan(scan, url), extract_emails_from_scan(scan)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200, help="synthetic pages to generate")
+    parser.add_argument("--corpus", help="directory of saved .html pages (overrides --pages)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args)
+    total_mb = sum(len(html) for _, html in corpus) / 1e6
+    print(f"{len(corpus)} pages, {total_mb:.1f} MB")
+
+    timings = {}
+    results = {}
+    for name, run in [("soup", run_soup), ("scanner", run_scanner)]:
+        start = time.perf_counter()
+        results[name] = run(corpus)
+        timings[name] = time.perf_counter() - start
+        print(f"  {name + ':':9}{timings[name]:7.2f}s  ({len(corpus) / timings[name]:7.1f} pages/s)")
+
+    # Socials: compare platforms found (the old code picked among several
+    # candidates in set order); emails: compare as sets
+    differ = sum(
+        1 for (s_old, e_old), (s_new, e_new) in zip(results["soup"], results["scanner"])
+        if set(s_old) != set(s_new) or set(e_old) != set(e_new)
+    )
+    print(f"  speedup:  {timings['soup'] / timings['scanner']:7.1f}x  ({differ} pages with differing results)")
+
+
+if __name__ == "__main__":
+    main()
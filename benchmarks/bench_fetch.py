@@ -0,0 +1,118 @@
+"""
+Benchmark: sequential scraping vs. the concurrent fetch engine.
+
+Starts a local stand-in HTTP server that serves fake broker homepages with a
+fixed per-request latency, then scrapes N sites both ways:
+
+  * sequential - the old loop: scrape_website() then sleep(delay)
+  * engine     - FetchEngine with per-site politeness of the same delay
+
+Usage (from the repo root):
+    python -m benchmarks.bench_fetch --sites 60 --latency 0.2 --delay 0.5
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from enrichment.fetcher import FetchEngine
+from scrape_socials import scrape_website
+
+PAGE = """<html><head><title>{site} Mortgage</title></head><body>
+<nav><a href="/">Home</a> <a href="/contact">Contact</a></nav>
+<p>Non-QM lending in Texas. Email us at info@{site}.example-broker.net</p>
+<footer>
+<a href="https://www.facebook.com/{site}mortgage">Facebook</a>
+<a href="https://www.linkedin.com/company/{site}-mortgage">LinkedIn</a>
+<a href="https://www.instagram.com/{site}mortgage/">Instagram</a>
+</footer></body></html>"""
+
+
+def make_handler(latency, handshake=0.0, connections=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def setup(self):
+            # Stand-in for TCP + TLS setup cost, paid once per connection
+            if connections is not None:
+                connections.append(1)
+            time.sleep(handshake)
+            super().setup()
+
+        def do_GET(self):
+            time.sleep(latency)
+            site = self.path.strip("/").split("/")[0] or "home"
+            body = PAGE.format(site=site).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(latency, handshake=0.0):
+    connections = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(latency, handshake, connections))
+    server.connections = connections
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def site_key(url):
+    # Every stand-in site lives on one local port, so use the first path
+    # segment as the politeness key in place of the real host name.
+    return url.split("/")[3]
+
+
+def run_sequential(urls, delay):
+    found = 0
+    for url in urls:
+        if scrape_website(url):
+            found += 1
+        time.sleep(delay)
+    return found
+
+
+def run_engine(urls, delay, workers):
+    engine = FetchEngine(max_workers=workers, host_delay=delay)
+    return sum(1 for _, socials in engine.run(scrape_website, urls, key=site_key) if socials)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2, help="server latency per request (s)")
+    parser.add_argument("--delay", type=float, default=0.5, help="politeness delay (s)")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    server = start_server(args.latency)
+    port = server.server_address[1]
+    urls = [f"http://127.0.0.1:{port}/site{i}/" for i in range(args.sites)]
+
+    print(f"{args.sites} sites, {args.latency}s latency, {args.delay}s politeness delay")
+
+    start = time.perf_counter()
+    found = run_sequential(urls, args.delay)
+    seq = time.perf_counter() - start
+    print(f"  sequential: {seq:7.2f}s  ({found} sites with socials)")
+
+    start = time.perf_counter()
+    found = run_engine(urls, args.delay, args.workers)
+    eng = time.perf_counter() - start
+    print(f"  engine:     {eng:7.2f}s  ({found} sites with socials, {args.workers} workers)")
+
+    print(f"  speedup:    {seq / eng:7.1f}x")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
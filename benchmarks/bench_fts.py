@@ -0,0 +1,76 @@
+"""
+Benchmark: LIKE '%term%' lead search vs. the leads_fts full-text index.
+
+Uses the synthetic lead database from bench_queries (built on first use),
+adds the full-text index if it is missing, then times what a /leads search
+runs - the COUNT and the first page - for a few searches, two ways:
+
+  * like - the old (name LIKE '%x%' OR company LIKE '%x%'), sorted by rank
+  * fts  - lead_filters() joining leads_fts MATCH, sorted by bm25 relevance
+
+Usage (from the repo root):
+    python -m benchmarks.bench_fts --leads 1000000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from werkzeug.datastructures import MultiDict
+
+from benchmarks.bench_queries import build
+from models import FTS_RANK, FTS_SCHEMA
+from routes.leads import PER_PAGE, SORT_ORDERS, lead_filters
+
+SEARCHES = ["maria bergon", "carjo mortgage", "fund", "alden42"]
+
+
+def timed(conn, count_sql, page_sql, params):
+    start = time.perf_counter()
+    total = conn.execute(count_sql, params).fetchone()[0]
+    conn.execute(page_sql, params + [PER_PAGE]).fetchall()
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--db", help="database path (default: bench_queries' file in the temp directory)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.gettempdir(), f"bench_queries_{args.leads}.db")
+    conn = sqlite3.connect(path) if os.path.exists(path) else build(path, args.leads)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'leads_fts'").fetchone():
+        start = time.perf_counter()
+        conn.executescript(FTS_SCHEMA)
+        conn.execute("INSERT INTO leads_fts (leads_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO leads_fts (leads_fts, rank) VALUES ('rank', ?)", (FTS_RANK,))
+        conn.commit()
+        print(f"Full-text index built in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'search':22}{'like':>10}{'fts':>10}{'speedup':>10}   matches (like / fts)")
+    for search in SEARCHES:
+        like = f"%{search}%"
+        where = "(leads.name LIKE ? OR leads.company LIKE ?)"
+        old, old_total = timed(
+            conn,
+            f"SELECT COUNT(*) FROM leads WHERE {where}",
+            f"SELECT * FROM leads WHERE {where} ORDER BY CAST(leads.rank AS INTEGER) LIMIT ?",
+            [like, like],
+        )
+
+        from_sql, where_sql, params = lead_filters(MultiDict({"search": search, "show_archived": "all"}))
+        new, new_total = timed(
+            conn,
+            f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}",
+            f"SELECT leads.* FROM {from_sql} WHERE {where_sql} ORDER BY {SORT_ORDERS['relevance']} LIMIT ?",
+            params,
+        )
+        print(f"{search:22}{old * 1000:8.1f}ms{new * 1000:8.1f}ms{old / new:9.0f}x   {old_total} / {new_total}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: per-row lead import vs. the set-based LeadImporter.
+
+Generates a synthetic file of N rows shaped like the broker CSV and imports
+it into fresh temporary databases two ways:
+
+  * per-row - the old loop: upsert, SELECT id, then list_leads and name
+              fix-ups one row at a time
+  * bulk    - LeadImporter: executemany into a stage, one upsert, one link
+
+Usage (from the repo root):
+    python -m benchmarks.bench_import --rows 100000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from import_csv import COLUMN_MAP
+from importer import LeadImporter, map_columns
+from models import FTS_SCHEMA, INDEXES, SCHEMA
+
+CITIES = ["Houston", "Dallas", "Austin", "San Antonio", "Fort Worth", "Plano", "Frisco", "Katy"]
+
+
+def make_rows(n, seed=1):
+    rnd = random.Random(seed)
+    header = list(COLUMN_MAP)
+    rows = []
+    for i in range(n):
+        volume = rnd.randint(100_000, 90_000_000)
+        values = {
+            "NMLSID": str(100000 + i),
+            "Name": f"Loan Officer {i}",
+            "LO Role": rnd.choice(["LO", "BM"]),
+            "Company": f"Broker Co {i % (n // 5 or 1)}",
+            "City": rnd.choice(CITIES),
+            "State": "TX",
+            "#": str(i + 1),
+            "Volume": f"${volume / 1_000_000:.1f}M",
+            "Units": str(rnd.randint(1, 300)),
+            "Volume Export": f"{volume:,}",
+        }
+        rows.append([values.get(col, "") for col in header])
+    return header, rows
+
+
+def new_db(path):
+    conn = sqlite3.connect(path)
+    # Same connection settings as models.get_db
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    conn.executescript(INDEXES)
+    conn.executescript(FTS_SCHEMA)
+    list_id = conn.execute("INSERT INTO lists (name) VALUES ('bench')").lastrowid
+    return conn, list_id
+
+
+def import_per_row(conn, list_id, header, rows):
+    col_indices = map_columns(header, COLUMN_MAP)
+    sorted_indices = sorted(col_indices)
+    db_columns = [col_indices[idx] for idx in sorted_indices]
+    update_set = ", ".join(f"{c} = excluded.{c}" for c in db_columns if c != "nmlsid")
+    insert_sql = f"""
+        INSERT INTO leads ({", ".join(db_columns)})
+        VALUES ({", ".join(["?"] * len(db_columns))})
+        ON CONFLICT(nmlsid) DO UPDATE SET {update_set}
+    """
+    nmlsid_idx = header.index("NMLSID")
+    lead_ids = []
+    for row in rows:
+        conn.execute(insert_sql, [row[idx] for idx in sorted_indices])
+        lead_row = conn.execute("SELECT id FROM leads WHERE nmlsid = ?", (row[nmlsid_idx],)).fetchone()
+        lead_ids.append(lead_row[0])
+    for lead_id in lead_ids:
+        conn.execute("INSERT OR IGNORE INTO list_leads (list_id, lead_id) VALUES (?, ?)", (list_id, lead_id))
+    for lead_id in lead_ids:
+        conn.execute("UPDATE leads SET name = company WHERE id = ? AND (name IS NULL OR name = '')", (lead_id,))
+    conn.commit()
+    return len(lead_ids)
+
+
+def import_bulk(conn, list_id, header, rows):
+    importer = LeadImporter(conn, map_columns(header, COLUMN_MAP), list_id)
+    importer.add_rows(rows)
+    count = importer.finish()
+    conn.commit()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    header, rows = make_rows(args.rows)
+    print(f"{args.rows} rows, {len(header)} columns")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for label, fn in [("per-row", import_per_row), ("bulk", import_bulk)]:
+            conn, list_id = new_db(os.path.join(tmp, f"{label}.db"))
+            start = time.perf_counter()
+            count = fn(conn, list_id, header, rows)
+            timings[label] = time.perf_counter() - start
+            conn.close()
+            print(f"  {label:8s} {timings[label]:7.2f}s  ({count} leads linked)")
+
+    print(f"  speedup: {timings['per-row'] / timings['bulk']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: a new connection per request vs. the shared keep-alive pool.
+
+Crawls N stand-in broker sites the way the email scraper does - homepage,
+then the four CONTACT_PATHS subpages on the same host - against a local
+server that charges a fixed setup cost per new connection (standing in for
+the TCP + TLS handshake of a real site):
+
+  * per-request - module-level requests.get(), as the scrapers used to
+  * pooled      - enrichment.sessions.fetch_html(), reusing connections per host
+
+Usage (from the repo root):
+    python -m benchmarks.bench_keepalive --sites 20 --handshake 0.05
+"""
+
+import argparse
+import time
+
+import requests
+
+from benchmarks.bench_fetch import start_server
+from enrichment import sessions
+from scrape_emails import CONTACT_PATHS
+
+
+def crawl(get, base_urls):
+    pages = 0
+    for base in base_urls:
+        for url in [base] + [base.rstrip("/") + path for path in CONTACT_PATHS]:
+            get(url)
+            pages += 1
+    return pages
+
+
+def per_request_get(url):
+    resp = requests.get(url, headers=sessions.HEADERS, timeout=sessions.REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return resp.text
+
+
+def pooled_get(url):
+    return sessions.fetch_html(url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="server latency per request (s)")
+    parser.add_argument("--handshake", type=float, default=0.05, help="setup cost per new connection (s)")
+    args = parser.parse_args()
+
+    server = start_server(args.latency, args.handshake)
+    port = server.server_address[1]
+    base_urls = [f"http://127.0.0.1:{port}/site{i}/" for i in range(args.sites)]
+    pages_per_site = 1 + len(CONTACT_PATHS)
+
+    print(f"{args.sites} sites x {pages_per_site} pages, {args.latency}s latency, "
+          f"{args.handshake}s per new connection")
+
+    results = {}
+    for name, get in [("per-request", per_request_get), ("pooled", pooled_get)]:
+        del server.connections[:]
+        start = time.perf_counter()
+        pages = crawl(get, base_urls)
+        elapsed = time.perf_counter() - start
+        results[name] = elapsed
+        print(f"  {name + ':':13}{elapsed:7.2f}s  ({elapsed / args.sites * 1000:6.1f} ms/site, "
+              f"{len(server.connections)} connections for {pages} pages)")
+
+    print(f"  saved:       {(results['per-request'] - results['pooled']) / args.sites * 1000:6.1f} ms/site "
+          f"({results['per-request'] / results['pooled']:.1f}x)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
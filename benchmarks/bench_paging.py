@@ -0,0 +1,90 @@
+"""
+Benchmark: OFFSET pagination vs. keyset pagination of the lead browser.
+
+Uses the synthetic lead database from bench_queries (built on first use,
+with models.INDEXES added if missing) and times fetching one page deep into
+a sorted /leads listing, two ways:
+
+  * offset - ORDER BY ... LIMIT 25 OFFSET (page - 1) * 25, which steps over
+             every earlier row
+  * keyset - the same ORDER BY, starting after the previous page's last
+             (sort value, id), as the Next link does
+
+and checks both return the same rows.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_paging --leads 1000000 --page 4000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from werkzeug.datastructures import MultiDict
+
+from benchmarks.bench_queries import build, ensure_contacts
+from models import INDEXES
+from routes.leads import PER_PAGE, SORT_KEYS, keyset_ranges, lead_filters, order_sql
+
+# (label, /leads query arguments)
+VIEWS = [
+    ("all, rank", {"show_archived": "all", "sort": "rank"}),
+    ("all, volume", {"show_archived": "all", "sort": "volume"}),
+    ("all, name", {"show_archived": "all", "sort": "name"}),
+    ("not contacted, rank", {"sort": "rank"}),
+    ("role BM, volume", {"role": "BM", "show_archived": "all", "sort": "volume"}),
+]
+
+
+def fetch(conn, from_sql, where_sql, params, sort, offset=0, ranges=(("1=1", []),)):
+    col = SORT_KEYS[sort][0]
+    start = time.perf_counter()
+    rows = []
+    for range_sql, range_params in ranges:
+        rows += conn.execute(
+            f"""SELECT leads.id, {col} FROM {from_sql} WHERE {where_sql} AND {range_sql}
+                ORDER BY {order_sql(sort)} LIMIT ? OFFSET ?""",
+            params + range_params + [PER_PAGE - len(rows), offset],
+        ).fetchall()
+        if len(rows) == PER_PAGE:
+            break
+    return time.perf_counter() - start, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=4000)
+    parser.add_argument("--db", help="database path (default: bench_queries' file in the temp directory)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.gettempdir(), f"bench_queries_{args.leads}.db")
+    conn = sqlite3.connect(path) if os.path.exists(path) else build(path, args.leads)
+    conn.executescript(INDEXES)
+    ensure_contacts(conn)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("ANALYZE")
+
+    print(f"page {args.page} ({PER_PAGE} per page)")
+    print(f"{'view':24}{'offset':>10}{'keyset':>10}{'speedup':>10}")
+    for label, view in VIEWS:
+        sort = view["sort"]
+        from_sql, where_sql, params = lead_filters(MultiDict(view))
+        offset = (args.page - 1) * PER_PAGE
+
+        old, old_rows = fetch(conn, from_sql, where_sql, params, sort, offset)
+        # The cursor a Next link on the previous page would carry
+        _, prev = fetch(conn, from_sql, where_sql, params, sort, offset - 1)
+        lead_id, value = prev[0]
+        ranges = keyset_ranges(sort, (value, lead_id))
+        new, new_rows = fetch(conn, from_sql, where_sql, params, sort, ranges=ranges)
+
+        assert new_rows == old_rows, label
+        print(f"{label:24}{old * 1000:8.1f}ms{new * 1000:8.2f}ms{old / new:9.0f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark: /leads queries before and after the lead indexes.
+
+Builds a synthetic database of N leads (default 1M) and a history of
+outreach logs, then times the queries one /leads page view runs - the
+filtered COUNT, the sorted page, the city dropdown and the archived badge -
+for a handful of typical filter/sort combinations, two ways:
+
+  * before - the old SQL (CAST(rank), CAST(REPLACE(volume_export)),
+             NOT IN (SELECT DISTINCT ...)) without secondary indexes
+  * after  - routes.leads.lead_filters()/SORT_ORDERS over the typed columns
+             and the lead_contacts state table, with models.INDEXES created
+             and ANALYZE run
+
+The database is kept in a temp directory (or --db) and rebuilt only when
+missing, since generating a million rows takes a while.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_queries --leads 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from werkzeug.datastructures import MultiDict
+
+from models import CONTACTS_BACKFILL, CONTACTS_SCHEMA, INDEXES, SCHEMA
+from routes.leads import PER_PAGE, SORT_ORDERS, lead_filters
+
+CITIES = ["Houston", "Dallas", "Austin", "San Antonio", "Fort Worth", "Plano", "Frisco", "Katy",
+          "El Paso", "Arlington", "Corpus Christi", "Lubbock", "Laredo", "Irving", "Garland", "Amarillo"]
+
+# (label, /leads query arguments, page number)
+VIEWS = [
+    ("default, page 1", {}, 1),
+    ("city + volume sort", {"city": "Austin", "sort": "volume"}, 1),
+    ("role, page 200", {"role": "BM"}, 200),
+    ("contacted only", {"show_archived": "only"}, 1),
+    ("all, volume, page 50", {"show_archived": "all", "sort": "volume"}, 50),
+]
+
+FIRST_NAMES = ["Maria", "James", "Jose", "Linda", "David", "Patricia", "Michael", "Jennifer", "Carlos",
+               "Elizabeth", "Robert", "Sandra", "Juan", "Ashley", "William", "Angela", "Luis", "Karen",
+               "Thomas", "Nancy", "Daniel", "Lisa", "Miguel", "Rebecca", "Kevin", "Laura", "Brian", "Sarah"]
+SYLLABLES = ["al", "ber", "car", "den", "el", "fer", "gon", "har", "is", "jo", "ken", "lo", "mar",
+             "nel", "or", "per", "ri", "san", "tor", "val", "wes", "za"]
+COMPANY_WORDS = ["Mortgage", "Lending", "Home Loans", "Capital", "Funding", "Financial", "Realty Finance"]
+
+OLD_SORTS = {
+    "rank": "CAST(leads.rank AS INTEGER)",
+    "volume": "CAST(REPLACE(REPLACE(leads.volume_export, ',', ''), '$', '') AS INTEGER) DESC",
+}
+OLD_SENT = "SELECT DISTINCT lead_id FROM outreach_logs WHERE result = 'sent'"
+OLD_ARCHIVED = "SELECT COUNT(DISTINCT lead_id) FROM outreach_logs WHERE result = 'sent'"
+ARCHIVED = "SELECT COUNT(DISTINCT lead_id) FROM lead_contacts WHERE sent > 0"
+
+
+def build(path, n):
+    rnd = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+
+    def surname():
+        return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))).title()
+
+    def leads():
+        for i in range(n):
+            volume = rnd.randint(100_000, 90_000_000)
+            company = f"{surname()} {rnd.choice(COMPANY_WORDS)} LLC"
+            website = f"https://www.{company.split()[0].lower()}{i % 97}.com"
+            yield (str(100000 + i), f"{rnd.choice(FIRST_NAMES)} {surname()}", rnd.choice(["LO", "LO", "LO", "BM"]),
+                   company, rnd.choice(CITIES), "TX", i + 1, f"{volume:,}", volume, website,
+                   f"info@{website[12:]}" if rnd.random() < 0.4 else "")
+
+    conn.executemany(
+        """INSERT INTO leads (nmlsid, name, lo_role, company, city, state, rank, volume_export,
+                              volume_export_amount, company_website, email)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        leads(),
+    )
+    logs = ((rnd.randint(1, n), rnd.choice(["email", "facebook", "linkedin"]),
+             rnd.choice(["sent", "sent", "skipped"])) for _ in range(n // 5))
+    conn.executemany("INSERT INTO outreach_logs (lead_id, platform, result) VALUES (?, ?, ?)", logs)
+    conn.commit()
+    return conn
+
+
+def ensure_contacts(conn):
+    """Add lead_contacts to a database built before it existed."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lead_contacts'").fetchone():
+        conn.executescript(CONTACTS_SCHEMA)
+        conn.execute(CONTACTS_BACKFILL)
+        conn.commit()
+
+
+def old_where(args):
+    clauses, params = [], []
+    if args.get("role"):
+        clauses.append("leads.lo_role = ?")
+        params.append(args["role"])
+    if args.get("city"):
+        clauses.append("leads.city = ?")
+        params.append(args["city"])
+    archived = args.get("show_archived", "")
+    if archived == "only":
+        clauses.append(f"leads.id IN ({OLD_SENT})")
+    elif archived != "all":
+        clauses.append(f"leads.id NOT IN ({OLD_SENT})")
+    return " AND ".join(clauses) or "1=1", params
+
+
+def page_view(conn, where_sql, params, order_sql, page, from_sql="leads", archived_sql=ARCHIVED):
+    start = time.perf_counter()
+    conn.execute(f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}", params).fetchone()
+    conn.execute(
+        f"SELECT leads.* FROM {from_sql} WHERE {where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+        params + [PER_PAGE, (page - 1) * PER_PAGE],
+    ).fetchall()
+    conn.execute("SELECT DISTINCT city FROM leads WHERE city != '' ORDER BY city").fetchall()
+    conn.execute(archived_sql).fetchone()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=1_000_000)
+    parser.add_argument("--db", help="database path (default: a file in the temp directory)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.gettempdir(), f"bench_queries_{args.leads}.db")
+    if os.path.exists(path):
+        conn = sqlite3.connect(path)
+    else:
+        print(f"Building {args.leads:,} leads in {path} ...")
+        start = time.perf_counter()
+        conn = build(path, args.leads)
+        print(f"  built in {time.perf_counter() - start:.1f}s")
+
+    # Start from no secondary indexes, as before the migration
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.execute("DROP TABLE IF EXISTS sqlite_stat1")
+
+    before = {}
+    for label, view, page in VIEWS:
+        where_sql, params = old_where(view)
+        order_sql = OLD_SORTS[view.get("sort", "rank")]
+        before[label] = page_view(conn, where_sql, params, order_sql, page, archived_sql=OLD_ARCHIVED)
+
+    start = time.perf_counter()
+    conn.executescript(INDEXES)
+    ensure_contacts(conn)
+    conn.execute("ANALYZE")
+    print(f"Indexes created and analyzed in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'view':24}{'before':>10}{'after':>10}{'speedup':>10}")
+    for label, view, page in VIEWS:
+        from_sql, where_sql, params = lead_filters(MultiDict(view))
+        order_sql = SORT_ORDERS[view.get("sort", "rank")]
+        after = page_view(conn, where_sql, params, order_sql, page, from_sql)
+        print(f"{label:24}{before[label] * 1000:8.0f}ms{after * 1000:8.0f}ms{before[label] / after:9.1f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
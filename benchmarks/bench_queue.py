@@ -0,0 +1,73 @@
+"""
+Benchmark: reading a session's current lead, JSON queue vs. outreach_queue.
+
+Creates outreach sessions of growing length in a scratch database and
+times what every outreach click does to find the lead at the session's
+position, two ways:
+
+  * json  - the old lead_queue column: load the session row, json.loads
+            the whole array, index into it
+  * table - models' outreach_queue: one primary-key lookup of
+            (session_id, position)
+
+Usage (from the repo root):
+    python -m benchmarks.bench_queue --clicks 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from models import SCHEMA
+
+SIZES = [100, 1_000, 10_000, 50_000]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clicks", type=int, default=2000)
+    args = parser.parse_args()
+
+    rnd = random.Random(3)
+    path = os.path.join(tempfile.mkdtemp(), "bench_queue.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute("CREATE TABLE json_sessions (id INTEGER PRIMARY KEY, lead_queue TEXT)")
+    for size in SIZES:
+        queue = rnd.sample(range(1, 1_000_000), size)
+        session_id = conn.execute("INSERT INTO outreach_sessions (platform, lead_count) VALUES ('email', ?)",
+                                  (size,)).lastrowid
+        conn.execute("INSERT INTO json_sessions (id, lead_queue) VALUES (?, ?)", (session_id, json.dumps(queue)))
+        conn.executemany("INSERT INTO outreach_queue (session_id, position, lead_id) VALUES (?, ?, ?)",
+                         ((session_id, pos, lead_id) for pos, lead_id in enumerate(queue)))
+    conn.commit()
+
+    print(f"{'queue length':>14}{'json':>12}{'table':>12}{'speedup':>10}   (per click)")
+    for session_id, size in enumerate(SIZES, start=1):
+        positions = [rnd.randrange(size) for _ in range(args.clicks)]
+
+        start = time.perf_counter()
+        old = []
+        for pos in positions:
+            row = conn.execute("SELECT lead_queue FROM json_sessions WHERE id = ?", (session_id,)).fetchone()
+            old.append(json.loads(row[0])[pos])
+        old_time = (time.perf_counter() - start) / args.clicks
+
+        start = time.perf_counter()
+        new = []
+        for pos in positions:
+            new.append(conn.execute("SELECT lead_id FROM outreach_queue WHERE session_id = ? AND position = ?",
+                                    (session_id, pos)).fetchone()[0])
+        new_time = (time.perf_counter() - start) / args.clicks
+
+        assert old == new
+        print(f"{size:>14,}{old_time * 1e6:10.1f}us{new_time * 1e6:10.1f}us{old_time / new_time:9.0f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
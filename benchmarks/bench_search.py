@@ -0,0 +1,109 @@
+"""
+Benchmark: fixed-delay sequential searching vs. the adaptive search client.
+
+Runs N company-URL searches against a fake search backend that answers with
+a fixed latency and, like DuckDuckGo, throttles callers that exceed a
+request rate (sliding one-second window). It raises what DDGS.text does:
+TimeoutException when throttled, DDGSException("No results found.") for
+queries it has no answer for:
+
+  * sequential - the old loop: one query, then sleep(delay)
+  * client     - SearchClient: token bucket + AIMD rate + batch concurrency
+
+Time is scaled down so the run is short: pick --limit / --delay in the same
+ratio as the real service (the old code slept 1.5s between queries).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_search --queries 60 --limit 8 --delay 0.15
+"""
+
+import argparse
+import collections
+import threading
+import time
+import zlib
+
+from ddgs.exceptions import DDGSException, TimeoutException
+
+from enrichment.search import NO_RESULTS, SearchClient
+
+
+class FakeSearchBackend:
+    """Stand-in for DDGS.text with latency and a requests-per-second limit."""
+
+    def __init__(self, latency, limit, missing=0.2):
+        self.latency = latency
+        self.limit = limit
+        self.missing = missing  # share of queries with no results
+        self.calls = 0
+        self.rejected = 0
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+
+    def text(self, query, max_results=8):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1.0:
+                self._recent.popleft()
+            self.calls += 1
+            if len(self._recent) >= self.limit:
+                self.rejected += 1
+                raise TimeoutException("Request timed out")
+            self._recent.append(now)
+        time.sleep(self.latency)
+        slug = query.split()[0].lower()
+        if zlib.crc32(slug.encode()) % 100 < self.missing * 100:
+            raise DDGSException(NO_RESULTS)
+        return [{"href": f"https://www.{slug}.example-broker.net/", "title": query, "body": ""}]
+
+
+def run_sequential(backend, queries, delay):
+    found = 0
+    for query in queries:
+        try:
+            found += bool(backend.text(query))
+        except DDGSException:
+            pass
+        time.sleep(delay)
+    return found
+
+
+def run_client(backend, queries, limit, workers):
+    client = SearchClient(
+        backend=backend, rate=limit / 4, max_rate=limit * 2, min_rate=0.5,
+        rate_step=limit / 20, burst=2, max_workers=workers, backoff=0.5,
+    )
+    found = sum(1 for _, results in client.batch(client.text, queries) if results)
+    return found, client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.3, help="backend latency per query (s)")
+    parser.add_argument("--limit", type=float, default=8, help="backend rate limit (queries/s)")
+    parser.add_argument("--delay", type=float, default=0.15, help="old fixed delay between queries (s)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    queries = [f"Broker{i} mortgage company official website" for i in range(args.queries)]
+    print(f"{args.queries} queries, {args.latency}s latency, backend limit {args.limit}/s")
+
+    backend = FakeSearchBackend(args.latency, args.limit)
+    start = time.perf_counter()
+    found = run_sequential(backend, queries, args.delay)
+    seq = time.perf_counter() - start
+    print(f"  sequential: {seq:7.2f}s  ({found} answered, {backend.rejected} throttled)")
+
+    backend = FakeSearchBackend(args.latency, args.limit)
+    start = time.perf_counter()
+    found, client = run_client(backend, queries, args.limit, args.workers)
+    cli = time.perf_counter() - start
+    print(f"  client:     {cli:7.2f}s  ({found} answered, {backend.rejected} throttled, "
+          f"final rate {client.rate:.1f}/s, {args.workers} workers)")
+
+    print(f"  speedup:    {seq / cli:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,54 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DATABASE = os.path.join(BASE_DIR, "data", "jerry_outreach.db")
+CACHE_DATABASE = os.path.join(BASE_DIR, "data", "enrichment_cache.db")
+
+# Enrichment cache expiry, in seconds, by entry status
+CACHE_TTL_POSITIVE = 180 * 86400  # a real result was found
+CACHE_TTL_NEGATIVE = 30 * 86400  # looked up, nothing found
+CACHE_TTL_ERROR = 1 * 86400  # the lookup itself failed
 UPLOAD_FOLDER_FLYERS = os.path.join(BASE_DIR, "uploads", "flyers")
 UPLOAD_FOLDER_CSV = os.path.join(BASE_DIR, "uploads", "csv")
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-jerry-nonqm-secret-key")
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 
+# Extra scraper filter entries, one per line (junk_email_domains.txt,
+# skip_url_domains.txt, skip_social_urls.txt), added to the built-in lists
+FILTERS_DIR = os.environ.get("FILTERS_DIR", os.path.join(BASE_DIR, "filters"))
+
 ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
 ALLOWED_CSV_EXTENSIONS = {"csv", "xlsx"}
+IMPORT_BATCH_SIZE = 1000  # rows staged and committed per import batch
+COUNT_CACHE_TTL = 30  # seconds a lead browser total is reused before re-counting
+EXPORT_CHUNK_SIZE = 1000  # rows fetched and encoded at a time by streaming exports
+
+# Enrichment fetch engine: worker pool size and per-domain politeness
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "16"))
+FETCH_PER_HOST = 1  # concurrent requests allowed against one host
+FETCH_HOST_DELAY = 1.0  # seconds between requests to the same host
+CONTACT_MAX_PAGES = 4  # contact-like subpages tried per site when the homepage has no good email
+CONTACT_PER_HOST = 2  # of those, requests in flight at once against the site
+PIPELINE_QUEUE_SIZE = 100  # items buffered between enrichment pipeline stages
+
+# Shared HTTP connection pool for the scrapers
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "64"))  # hosts with a cached connection pool
+HTTP_POOL_PER_HOST = int(os.environ.get("HTTP_POOL_PER_HOST", "4"))  # keep-alive connections kept per host
+HTTP2 = os.environ.get("HTTP2") == "1"  # use httpx with HTTP/2 when installed
+HTTP_MAX_BYTES = 2 * 1024 * 1024  # stop reading a page body after this many bytes
+HTTP_READ_DEADLINE = 20  # seconds allowed for reading one page body
+
+# DuckDuckGo search client: adaptive token-bucket rate, in queries per second
+SEARCH_RATE = 0.5  # starting rate
+SEARCH_MIN_RATE = 0.1
+SEARCH_MAX_RATE = 2.0
+SEARCH_RATE_STEP = 0.05  # added to the rate after each successful query
+SEARCH_BURST = 2  # queries allowed back to back after an idle spell
+SEARCH_WORKERS = 4  # concurrent searches in a batch
+SEARCH_MAX_RETRIES = 4  # retries of a rate-limited query
+SEARCH_BACKOFF = 5.0  # seconds paused after a rate limit, doubling on repeats
+
+# Background job queue (imports and enrichment)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))  # jobs running at once, across all processes
+JOB_POLL_INTERVAL = 2.0  # seconds between scheduler checks for queued jobs
+JOB_STALE_AFTER = 60  # seconds without a heartbeat before a running job is requeued
+JOB_MAX_ATTEMPTS = 3  # give up on a job that keeps dying mid-run
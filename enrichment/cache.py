@@ -0,0 +1,266 @@
+"""
+SQLite-backed cache store for enrichment lookups, one namespace per scraper.
+Entries carry a status ("ok", "empty" or "error") with its own TTL in config,
+plus the fingerprint of the page they came from for conditional re-fetches.
+
+Import the legacy JSON cache files (also done the first time an empty
+namespace is opened):
+    python -m enrichment.cache
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+import config
+
+# Legacy JSON cache file for each namespace, relative to the repo root
+LEGACY_JSON = {
+    "urls": "url_cache.json",
+    "socials": "social_cache.json",
+    "emails": "email_cache.json",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ok',
+    updated_at REAL NOT NULL,
+    etag TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+class Fingerprint(NamedTuple):
+    """What a cached value was computed from: the page's validators and hash."""
+    etag: str
+    last_modified: str
+    content_hash: str
+
+
+NO_FINGERPRINT = Fingerprint("", "", "")
+
+
+def _status_for(value):
+    return "ok" if value else "empty"
+
+
+def ttl_for(status):
+    return {
+        "ok": config.CACHE_TTL_POSITIVE,
+        "empty": config.CACHE_TTL_NEGATIVE,
+        "error": config.CACHE_TTL_ERROR,
+    }[status]
+
+
+class CacheStore:
+    """Dict-like view of one cache namespace with keyed single-entry I/O.
+
+    Supports `key in cache`, `cache[key]`, `cache[key] = value`,
+    `cache.get(key, default)` and `len(cache)`. Values are stored as JSON.
+    Safe to share between threads.
+    """
+
+    def __init__(self, namespace, path=None):
+        self.namespace = namespace
+        self.path = path or config.CACHE_DATABASE
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Migrate: add status to cache stores created before TTLs existed
+        cols = [row[1] for row in self._conn.execute("PRAGMA table_info(cache_entries)").fetchall()]
+        if "status" not in cols:
+            self._conn.execute("ALTER TABLE cache_entries ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+            self._conn.execute(
+                "UPDATE cache_entries SET status = 'empty' WHERE value IN ('[]', '{}', '\"\"', 'null')"
+            )
+        # Migrate: add page fingerprints
+        for col in Fingerprint._fields:
+            if col not in cols:
+                self._conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {col} TEXT NOT NULL DEFAULT ''")
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._write(key, value, _status_for(value))
+
+    def set(self, key, value, fingerprint=NO_FINGERPRINT):
+        """Store a value along with the fingerprint of the page it came from."""
+        self._write(key, value, _status_for(value), fingerprint)
+
+    def set_error(self, key, default=None):
+        """Record a failed lookup.
+
+        A previously cached value is kept (stale data beats none) but the
+        entry is marked as an error so it is retried after CACHE_TTL_ERROR.
+        One statement, so a value another worker stores meanwhile is never
+        overwritten by the older one.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO cache_entries (namespace, key, value, status, updated_at)
+                   VALUES (?, ?, ?, 'error', ?)
+                   ON CONFLICT(namespace, key) DO UPDATE SET
+                       status = 'error', updated_at = excluded.updated_at,
+                       etag = '', last_modified = '', content_hash = ''""",
+                (self.namespace, key, json.dumps(default), time.time()),
+            )
+
+    def _write(self, key, value, status, fingerprint=NO_FINGERPRINT):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO cache_entries
+                       (namespace, key, value, status, updated_at, etag, last_modified, content_hash)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(namespace, key) DO UPDATE SET
+                       value = excluded.value, status = excluded.status,
+                       updated_at = excluded.updated_at, etag = excluded.etag,
+                       last_modified = excluded.last_modified, content_hash = excluded.content_hash""",
+                (self.namespace, key, json.dumps(value), status, time.time(), *fingerprint),
+            )
+
+    def fingerprint(self, key):
+        """The stored page fingerprint of a good entry, or None.
+
+        Missing entries, failed lookups and values stored without a
+        fingerprint have none, so they are always recomputed in full.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT etag, last_modified, content_hash FROM cache_entries
+                   WHERE namespace = ? AND key = ? AND status != 'error'""",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None or not any(row):
+            return None
+        return Fingerprint(*row)
+
+    def touch(self, key, fingerprint):
+        """Mark an entry as re-checked and still current.
+
+        Keeps the value and status; renews the timestamp and stores the
+        page's latest validators.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """UPDATE cache_entries SET updated_at = ?, etag = ?, last_modified = ?, content_hash = ?
+                   WHERE namespace = ? AND key = ?""",
+                (time.time(), *fingerprint, self.namespace, key),
+            )
+
+    def needs_refresh(self, key, retry_errors=False):
+        """True if the entry is missing or past the TTL for its status.
+
+        With retry_errors, failed lookups are due regardless of age.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, updated_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None:
+            return True
+        status, updated_at = row
+        if retry_errors and status == "error":
+            return True
+        return time.time() - updated_at > ttl_for(status)
+
+    def status(self, key):
+        """The entry's status ("ok", "empty" or "error"), or None if absent."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,),
+            ).fetchone()[0]
+
+    def updated_at(self, key):
+        """Unix timestamp of the entry's last write, or None if absent."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return row[0] if row else None
+
+    def import_json(self, json_path):
+        """Bulk-load a legacy JSON cache file. Existing entries win."""
+        with open(json_path, "r") as f:
+            data = json.load(f)
+        mtime = os.path.getmtime(json_path)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT OR IGNORE INTO cache_entries (namespace, key, value, status, updated_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                [(self.namespace, k, json.dumps(v), _status_for(v), mtime) for k, v in data.items()],
+            )
+        return len(data)
+
+    def close(self):
+        self._conn.close()
+
+
+def open_cache(namespace):
+    """Open a cache namespace, importing its legacy JSON file on first use."""
+    cache = CacheStore(namespace)
+    legacy = LEGACY_JSON.get(namespace)
+    if legacy and len(cache) == 0:
+        legacy_path = os.path.join(config.BASE_DIR, legacy)
+        if os.path.exists(legacy_path):
+            cache.import_json(legacy_path)
+    return cache
+
+
+def main():
+    for namespace, filename in LEGACY_JSON.items():
+        json_path = os.path.join(config.BASE_DIR, filename)
+        if not os.path.exists(json_path):
+            print(f"{filename}: not found, skipped")
+            continue
+        cache = CacheStore(namespace)
+        count = cache.import_json(json_path)
+        print(f"{filename}: {count} entries -> '{namespace}' ({len(cache)} total)")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Precompiled domain and URL filters for the scrapers.
+DomainMatcher matches a host that is a listed domain or under one;
+UrlMatcher adds a path prefix per entry ("facebook.com/sharer").
+load_filter() adds entries from text files in config.FILTERS_DIR.
+"""
+
+import os
+from urllib.parse import urlparse
+
+import config
+
+
+def _normalize(host):
+    return host.strip(".").lower()
+
+
+def _labels(host):
+    return tuple(reversed(_normalize(host).split(".")))
+
+
+class DomainMatcher:
+    """Set of domains; matches a host that is a listed domain or under one."""
+
+    def __init__(self, domains):
+        self._domains = {}
+        self._max_depth = 0
+        for domain in domains:
+            labels = _labels(domain)
+            self._domains[labels] = ".".join(reversed(labels))
+            self._max_depth = max(self._max_depth, len(labels))
+
+    def __len__(self):
+        return len(self._domains)
+
+    def match(self, host):
+        """Return the listed domain covering host, or None."""
+        if not host:
+            return None
+        labels = _labels(host)
+        for depth in range(1, min(len(labels), self._max_depth) + 1):
+            found = self._domains.get(labels[:depth])
+            if found:
+                return found
+        return None
+
+    def __contains__(self, host):
+        return self.match(host) is not None
+
+
+def url_host(url):
+    """Lowercased hostname of a URL ("" if it has none or won't parse)."""
+    try:
+        return urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+
+
+class UrlMatcher:
+    """Set of "host/path-prefix" patterns; a bare host matches any path."""
+
+    def __init__(self, patterns):
+        prefixes = {}
+        for pattern in patterns:
+            host, slash, path = pattern.lower().partition("/")
+            host = _normalize(host)  # the form DomainMatcher.match returns
+            if host:
+                prefixes.setdefault(host, []).append(slash + path)
+        self._hosts = DomainMatcher(prefixes)
+        self._prefixes = prefixes
+
+    def match(self, url):
+        """True if url's host is (under) a listed host and its path has the prefix."""
+        try:
+            parsed = urlparse(url.lower())
+            host = parsed.hostname
+        except ValueError:
+            return False
+        domain = self._hosts.match(host)
+        if domain is None:
+            return False
+        path = parsed.path or "/"
+        return any(path.startswith(prefix) for prefix in self._prefixes.get(domain, ()))
+
+
+def load_filter(filename, defaults=()):
+    """Built-in entries plus any listed in FILTERS_DIR/filename."""
+    entries = set(defaults)
+    path = os.path.join(config.FILTERS_DIR, filename)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                entry = line.split("#", 1)[0].strip()
+                if entry:
+                    entries.add(entry.lower())
+    return entries
@@ -0,0 +1,92 @@
+"""
+Single-pass link and email scanner shared by the scrapers.
+scan_page() collects a page's anchor hrefs, social profile URLs and email
+candidates with one combined regex, falling back to BeautifulSoup for
+anchors the regex can't read.
+"""
+
+import html as html_lib
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup
+
+
+ANCHOR_TAG = re.compile(r"<a[\s>]", re.IGNORECASE)
+
+
+class PageScan(NamedTuple):
+    hrefs: list  # anchor hrefs, entity-decoded, in document order
+    socials: list  # social profile URLs matched in the raw markup
+    emails: list  # lowercased email candidates (mailto + raw markup), unfiltered
+
+
+@lru_cache(maxsize=1)
+def _token_regex():
+    from scrape_emails import EMAIL_REGEX
+    from scrape_socials import SOCIAL_PATTERNS
+
+    href = r"""<a\b[^>]*?\shref\s*=\s*(?:"(?P<dq>[^"]*)"|'(?P<sq>[^']*)'|(?P<uq>[^\s"'>]+))"""
+    social = "|".join(p["regex"] for p in SOCIAL_PATTERNS.values())
+    # The lookbehind starts email matches only at the beginning of a run of
+    # local-part characters, keeping long runs (base64 blobs) linear
+    email = r"(?<![a-zA-Z0-9._%+\-])" + EMAIL_REGEX.pattern
+    return re.compile(f"{href}|(?P<social>{social})|(?P<email>{email})", re.IGNORECASE)
+
+
+def _add_href(href, hrefs, emails, email_regex):
+    if "&" in href:
+        href = html_lib.unescape(href)
+    hrefs.append(href)
+    if href[:7].lower() == "mailto:":
+        raw = href[7:].split("?")[0].strip()
+        if email_regex.match(raw):
+            emails.append(raw.lower())
+    if "@" in href:
+        emails.extend(m.lower() for m in email_regex.findall(href))
+
+
+def _fast_scan(html):
+    from scrape_emails import EMAIL_REGEX
+
+    hrefs, socials, emails = [], [], []
+    for m in _token_regex().finditer(html):
+        kind = m.lastgroup
+        if kind == "social":
+            url = m.group("social")
+            socials.append(url)
+            if "@" in url:
+                emails.extend(e.lower() for e in EMAIL_REGEX.findall(url))
+        elif kind == "email":
+            emails.append(m.group("email").lower())
+        else:
+            _add_href(m.group(kind), hrefs, emails, EMAIL_REGEX)
+    return hrefs, socials, emails
+
+
+def _soup_scan(html):
+    """Fallback: read anchors with BeautifulSoup, regex the raw markup."""
+    from scrape_emails import EMAIL_REGEX
+    from scrape_socials import SOCIAL_PATTERNS
+
+    hrefs, emails = [], []
+    for tag in BeautifulSoup(html, "html.parser").find_all("a", href=True):
+        _add_href(tag["href"], hrefs, emails, EMAIL_REGEX)
+    socials = []
+    for pattern in SOCIAL_PATTERNS.values():
+        socials.extend(re.findall(pattern["regex"], html, re.IGNORECASE))
+    emails.extend(e.lower() for e in EMAIL_REGEX.findall(html))
+    return hrefs, socials, emails
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def scan_page(html: str) -> PageScan:
+    """Collect hrefs, social URLs and email candidates from a page in one pass."""
+    hrefs, socials, emails = _fast_scan(html)
+    if not hrefs and ANCHOR_TAG.search(html):
+        hrefs, socials, emails = _soup_scan(html)
+    return PageScan(_unique(hrefs), _unique(socials), _unique(emails))
@@ -0,0 +1,116 @@
+"""
+Concurrent fetch engine shared by the scrapers and the enrichment pipeline.
+
+Runs many fetch tasks at once on a bounded thread pool. Instead of a global
+sleep between every request, politeness is enforced per domain: at most
+FETCH_PER_HOST tasks in flight for a host, with FETCH_HOST_DELAY seconds
+between consecutive tasks against that same host.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import config
+
+
+def host_of(url: str) -> str:
+    """Politeness key for a URL: its lowercased host without a leading www."""
+    netloc = urlparse(url).netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class HostLimiter:
+    """Per-host concurrency cap plus a minimum gap between tasks on a host."""
+
+    def __init__(self, per_host=1, delay=1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._active = {}
+        self._next_at = {}
+
+    @contextmanager
+    def slot(self, host: str):
+        with self._cond:
+            while True:
+                if self._active.get(host, 0) < self.per_host:
+                    wait_for = self._next_at.get(host, 0) - time.monotonic()
+                    if wait_for <= 0:
+                        break
+                    self._cond.wait(wait_for)
+                else:
+                    self._cond.wait()
+            self._active[host] = self._active.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+                self._next_at[host] = time.monotonic() + self.delay
+                self._cond.notify_all()
+
+
+class FetchEngine:
+    """Run fetch tasks concurrently on a bounded worker pool.
+
+    Usage:
+        engine = FetchEngine()
+        for url, socials in engine.run(scrape_website, urls):
+            ...
+
+    Results are yielded in completion order, so callers can save progress as
+    they go. A task that raises is logged and yields None as its result.
+    """
+
+    def __init__(self, max_workers=None, per_host=None, host_delay=None):
+        self.max_workers = max_workers or config.FETCH_WORKERS
+        self.limiter = HostLimiter(
+            per_host=per_host or config.FETCH_PER_HOST,
+            delay=config.FETCH_HOST_DELAY if host_delay is None else host_delay,
+        )
+
+    def _call(self, fn, item, host):
+        with self.limiter.slot(host):
+            return fn(item)
+
+    def run(self, fn, items, key=host_of):
+        """Apply fn to every item, yielding (item, result) as tasks finish.
+
+        key maps an item to its politeness key (the host, by default).
+        At most 2 * max_workers tasks are queued at a time, so items can be
+        a lazy iterable of any length.
+        """
+        items = iter(items)
+        window = self.max_workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+
+            def fill():
+                while len(pending) < window:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                    future = pool.submit(self._call, fn, item, key(item))
+                    pending[future] = item
+
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                finished = []
+                for future in done:
+                    item = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"  ERROR fetching {item!r}: {e}")
+                        result = None
+                    finished.append((item, result))
+                fill()
+                yield from finished
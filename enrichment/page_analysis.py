@@ -0,0 +1,63 @@
+"""
+Single-fetch page analysis for the enrichment pipeline.
+
+Downloads a company homepage once, scans it once (enrichment.extract), and
+runs both the social-link and the email extractors over the same scan.
+Contact-like subpages linked from the homepage are only crawled when the
+homepage has no good email (see scrape_emails.crawl_contact_pages).
+
+Given the fingerprint stored with the cached results of the last analysis,
+the homepage is requested conditionally. A 304, or a body hashing the same
+as last time, means the page hasn't changed: extraction is skipped and the
+result says so ("unchanged"), so the caller keeps its cached values. The
+fingerprint covers the homepage only, so emails found on contact subpages
+are kept too, even if those subpages have changed since.
+"""
+
+import hashlib
+
+from enrichment.cache import Fingerprint
+from enrichment.extract import scan_page
+from enrichment.sessions import fetch_page
+from scrape_emails import (
+    extract_emails_from_scan, crawl_contact_pages, has_good_email, rank_emails,
+)
+from scrape_socials import extract_socials_from_scan
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha1(html.encode("utf-8", errors="replace")).hexdigest()
+
+
+def analyze_website(url: str, fingerprint=None) -> dict:
+    """Fetch a company homepage and extract socials and emails from it.
+
+    Returns {"socials": {platform: url}, "emails": [best first],
+    "fingerprint": Fingerprint, "unchanged": bool}. When unchanged is True
+    the homepage matches `fingerprint` and socials/emails are not filled
+    in; contact subpages are not re-crawled.
+    Raises if the homepage can't be fetched.
+    """
+    etag, last_modified = (fingerprint.etag, fingerprint.last_modified) if fingerprint else ("", "")
+    page = fetch_page(url, etag=etag, last_modified=last_modified)
+    if page.not_modified and fingerprint:
+        return {"socials": {}, "emails": [], "unchanged": True,
+                "fingerprint": Fingerprint(page.etag or etag, page.last_modified or last_modified,
+                                           fingerprint.content_hash)}
+
+    new_fingerprint = Fingerprint(page.etag, page.last_modified, content_hash(page.html))
+    if fingerprint and new_fingerprint.content_hash == fingerprint.content_hash:
+        return {"socials": {}, "emails": [], "unchanged": True, "fingerprint": new_fingerprint}
+
+    result = {"socials": {}, "emails": [], "unchanged": False, "fingerprint": new_fingerprint}
+    if not page.html:
+        return result
+
+    scan = scan_page(page.html)
+    emails = extract_emails_from_scan(scan)
+    if not has_good_email(emails):
+        emails.extend(crawl_contact_pages(url, scan.hrefs))
+
+    result["socials"] = extract_socials_from_scan(scan, url)
+    result["emails"] = rank_emails(emails)
+    return result
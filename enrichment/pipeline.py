@@ -1,164 +1,504 @@
 """
-Unified enrichment pipeline: URL lookup -> social scrape -> email scrape.
-Runs as a background thread, updating DB records as it progresses.
+Unified enrichment pipeline: URL lookup -> page analysis (socials + emails
+from a single fetch) -> email search for companies without a website.
+
+Enrichment works on companies, not leads: a list's leads are grouped by
+normalized company name, each company is looked up once, and its result is
+fanned out to all of its leads with a single set-based UPDATE. Results are
+stored per company in company_enrichment, so any other list containing the
+same company reuses them immediately instead of enriching it again. Like
+the lookup caches, each stored result has a status - found, nothing found,
+or a stage failed - and is reused for that status's TTL, so a company whose
+fetch or search failed is retried after CACHE_TTL_ERROR.
+
+The stages run concurrently as a streaming pipeline connected by bounded
+queues: a company moves on to page analysis as soon as its website is known
+(immediately, if it already had one), so search-bound URL lookups overlap
+with fetch-bound page analysis and email search. Stage threads never touch
+the database; they send results to the calling thread, the single writer,
+which applies them and tracks progress.
+
+Runs as a background job (see jobs.py), updating DB records as it
+progresses. Under a job, leads are checkpointed in the same commit as their
+updates, so a requeued job skips work already done.
 """
 
+import json
+import queue
 import sqlite3
+import threading
 import time
 import config
+from enrichment.cache import ttl_for
+from enrichment.fetcher import FetchEngine
+from enrichment.search import get_client
+from jobs import Checkpoint
+from models import bump_stats_version
+
+SOCIAL_PLATFORM_KEYS = ["facebook", "linkedin", "instagram", "twitter", "youtube", "tiktok"]
+SOCIAL_DB_KEYS = ["facebook", "linkedin", "instagram", "twitter_x", "youtube", "tiktok"]
+
+# Stage names in pipeline order, with the list status shown while each runs
+STAGE_STATUS = [
+    ("urls", "enriching_urls"),
+    ("pages", "enriching_socials"),
+    ("emails", "enriching_emails"),
+]
+
+_DONE = object()  # end-of-stream marker on the stage queues
+
+
+def company_key(name):
+    """Normalized company name used to group leads and store results."""
+    return " ".join((name or "").lower().split())
+
+
+def _fan_out(conn, lead_ids, result, overwrite=False):
+    """Apply one company's result to all of its leads in a single UPDATE.
+
+    The website only fills empty values; email and socials fill empty values,
+    or replace existing ones when overwrite is set.
+    """
+    assignments = [
+        "company_website = CASE WHEN company_website IS NULL OR company_website = '' "
+        "THEN :website ELSE company_website END"
+    ]
+    for col in ["email"] + SOCIAL_DB_KEYS:
+        assignments.append(
+            f"{col} = CASE WHEN :{col} != '' AND (:overwrite OR {col} IS NULL OR {col} = '') "
+            f"THEN :{col} ELSE {col} END"
+        )
+    conn.execute(
+        f"""UPDATE leads SET {', '.join(assignments)}
+            WHERE id IN (SELECT value FROM json_each(:lead_ids))""",
+        {**result, "overwrite": overwrite, "lead_ids": json.dumps(lead_ids)},
+    )
+    bump_stats_version(conn)
+
+
+def _save_company(conn, key, name, result, status):
+    conn.execute(
+        f"""INSERT INTO company_enrichment
+                (company_key, company, website, email, {', '.join(SOCIAL_DB_KEYS)}, status, updated_at)
+            VALUES (:key, :name, :website, :email, {', '.join(':' + c for c in SOCIAL_DB_KEYS)}, :status, :updated_at)
+            ON CONFLICT(company_key) DO UPDATE SET
+                company = excluded.company, website = excluded.website, email = excluded.email,
+                {', '.join(f'{c} = excluded.{c}' for c in SOCIAL_DB_KEYS)},
+                status = excluded.status, updated_at = excluded.updated_at""",
+        {**result, "key": key, "name": name, "status": status, "updated_at": time.time()},
+    )
+
+
+def _is_fresh(row):
+    """A stored company result is reused until the cache TTL for its status."""
+    return time.time() - row["updated_at"] <= ttl_for(row["status"])
+
+
+def _drain(q):
+    """Consume a stage queue up to its end marker so its producer never blocks."""
+    while q.get() is not _DONE:
+        pass
+
+
+class EnrichmentRun:
+    """One streaming enrichment pass over a list's companies.
+
+    resolve_urls -> page_q -> analyze_pages -\\
+                 -> search_q -> search_emails -> write_q -> write_results
+
+    companies maps company_key -> {"name", "website", "lead_ids", "needs_email"}.
+    A context manager: leaving it closes the run's cache connections.
+    """
+
+    def __init__(self, conn, list_id, companies, revalidate, checkpoint):
+        from lookup_urls import load_cache as load_url_cache
+        from scrape_socials import load_cache as load_social_cache
+        from scrape_emails import load_cache as load_email_cache
+
+        self.conn = conn
+        self.list_id = list_id
+        self.companies = companies
+        self.revalidate = revalidate
+        self.checkpoint = checkpoint
+
+        self.url_cache = load_url_cache()
+        self.social_cache = load_social_cache()
+        self.email_cache = load_email_cache()
+
+        self.page_q = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        self.search_q = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        self.write_q = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        self.cancel = threading.Event()  # set when the writer fails: stages wind down
+        self.running = {stage for stage, _ in STAGE_STATUS}  # stages that haven't reported done
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for cache in (self.url_cache, self.social_cache, self.email_cache):
+            cache.close()
 
+    def run(self):
+        stages = [
+            threading.Thread(target=self.resolve_urls, daemon=True),
+            threading.Thread(target=self.analyze_pages, daemon=True),
+            threading.Thread(target=self.search_emails, daemon=True),
+        ]
+        for thread in stages:
+            thread.start()
+        try:
+            self.write_results()
+        except BaseException:
+            # Stop the stages and keep taking their results until each is
+            # done, so none is left blocked on a full write_q
+            self.cancel.set()
+            while self.running:
+                msg = self.write_q.get()
+                if msg[0] == "stage_done":
+                    self.running.discard(msg[1])
+            raise
+        finally:
+            for thread in stages:
+                thread.join()
+
+    # Stage 1: URL lookup
+
+    def _route(self, key, url):
+        """Send a company on to page analysis or, without a website, email search."""
+        if url:
+            self.page_q.put((url, key))
+        elif self.companies[key]["needs_email"]:
+            self.search_q.put(key)
+        else:
+            self.write_q.put(("finish", key))
+
+    def resolve_urls(self):
+        try:
+            # Companies that already have a website go straight through, so
+            # page analysis starts while the searches below are still running
+            needs_url = []
+            for key, company in self.companies.items():
+                if company["website"]:
+                    self._route(key, company["website"])
+                else:
+                    needs_url.append(key)
+
+            from lookup_urls import search_company_url
+
+            # Serve fresh lookups from cache, then search the rest through
+            # the shared rate-limited client
+            to_search = []
+            for key in needs_url:
+                if self.cancel.is_set():
+                    return
+                name = self.companies[key]["name"]
+                if self.url_cache.needs_refresh(name, retry_errors=self.revalidate):
+                    to_search.append(key)
+                else:
+                    url = self.url_cache[name]
+                    self.write_q.put(("url", key, url, self.url_cache.status(name) == "error"))
+                    self._route(key, url)
+
+            def search(key):
+                return search_company_url(self.companies[key]["name"])
+
+            pending = (key for key in to_search if not self.cancel.is_set())
+            for key, url in get_client().batch(search, pending):
+                name = self.companies[key]["name"]
+                if url is None:
+                    self.url_cache.set_error(name, default="")
+                else:
+                    self.url_cache[name] = url
+                self.write_q.put(("url", key, url or "", url is None))
+                self._route(key, url or "")
+        except Exception as e:
+            print(f"URL enrichment error: {e}")
+        finally:
+            self.page_q.put(_DONE)
+            self.search_q.put(_DONE)
+            self.write_q.put(("stage_done", "urls"))
+
+    # Stage 2: page analysis
+
+    def _fingerprint(self, url):
+        """The page fingerprint both cached results share, if any.
+
+        A homepage is only fetched conditionally when its socials and its
+        emails were both computed from the same, fingerprinted page.
+        """
+        fingerprint = self.social_cache.fingerprint(url)
+        if fingerprint and fingerprint == self.email_cache.fingerprint(url):
+            return fingerprint
+        return None
+
+    def _cached_page(self, url):
+        """A site's cached results, flagged as failed if either lookup was."""
+        failed = "error" in (self.social_cache.status(url), self.email_cache.status(url))
+        return {"socials": self.social_cache.get(url, {}), "emails": self.email_cache.get(url, []), "failed": failed}
+
+    def _analyze(self, url):
+        from enrichment.page_analysis import analyze_website
+
+        try:
+            page = analyze_website(url, self._fingerprint(url))
+        except Exception as e:
+            print(f"  ERROR fetching {url!r}: {e}")
+            self.social_cache.set_error(url, default={})
+            self.email_cache.set_error(url, default=[])
+            page = {"socials": {}, "emails": [], "failed": True}
+        else:
+            if page["unchanged"]:
+                # 304 or same content: keep the cached results, renew them
+                self.social_cache.touch(url, page["fingerprint"])
+                self.email_cache.touch(url, page["fingerprint"])
+                page = self._cached_page(url)
+            else:
+                self.social_cache.set(url, page["socials"], page["fingerprint"])
+                self.email_cache.set(url, page["emails"], page["fingerprint"])
+                page = {"socials": page["socials"], "emails": page["emails"], "failed": False}
+        self.write_q.put(("page", url, page))
+
+    def _pages_to_fetch(self):
+        """Yield each new website that needs fetching; serve fresh ones from cache."""
+        seen = set()
+        while True:
+            item = self.page_q.get()
+            if item is _DONE:
+                return
+            if self.cancel.is_set():
+                continue
+            url, key = item
+            self.write_q.put(("site", url, key))
+            if url in seen:
+                continue
+            seen.add(url)
+
+            needs_email = self.companies[key]["needs_email"]
+            stale_socials = self.social_cache.needs_refresh(url, retry_errors=self.revalidate)
+            stale_emails = needs_email and self.email_cache.needs_refresh(url, retry_errors=self.revalidate)
+            if stale_socials or stale_emails:
+                yield url
+            else:
+                self.write_q.put(("page", url, self._cached_page(url)))
+
+    def analyze_pages(self):
+        try:
+            import urllib3
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def enrich_list(list_id):
-    """Run the full enrichment pipeline for a list's leads."""
-    conn = sqlite3.connect(config.DATABASE)
+            # Workers send their results to the writer themselves, so each
+            # result is applied as soon as its fetch finishes
+            for _ in FetchEngine().run(self._analyze, self._pages_to_fetch()):
+                pass
+        except Exception as e:
+            print(f"Page analysis error: {e}")
+            _drain(self.page_q)
+        finally:
+            self.write_q.put(("stage_done", "pages"))
+
+    # Stage 3: email search for companies without a website
+
+    def _find(self, target):
+        from scrape_emails import find_emails
+
+        cache_key = f"__no_website__{target['company']}"
+        try:
+            emails = find_emails(target)
+        except Exception as e:
+            print(f"  ERROR searching emails for {target['company']!r}: {e}")
+            self.email_cache.set_error(cache_key, default=[])
+            self.write_q.put(("emails", target["key"], [], True))
+        else:
+            self.email_cache[cache_key] = emails
+            self.write_q.put(("emails", target["key"], emails, False))
+
+    def _targets_to_search(self):
+        """Yield each company that needs an email search; serve fresh ones from cache."""
+        while True:
+            key = self.search_q.get()
+            if key is _DONE:
+                return
+            if self.cancel.is_set():
+                continue
+            name = self.companies[key]["name"]
+            cache_key = f"__no_website__{name}"
+            if self.email_cache.needs_refresh(cache_key, retry_errors=self.revalidate):
+                yield {"key": key, "website": "", "company": name}
+            else:
+                failed = self.email_cache.status(cache_key) == "error"
+                self.write_q.put(("emails", key, self.email_cache.get(cache_key, []), failed))
+
+    def search_emails(self):
+        try:
+            for _ in get_client().batch(self._find, self._targets_to_search()):
+                pass
+        except Exception as e:
+            print(f"Email enrichment error: {e}")
+            _drain(self.search_q)
+        finally:
+            self.write_q.put(("stage_done", "emails"))
+
+    # Writer
+
+    def _set_status(self, running):
+        for stage, status in STAGE_STATUS:
+            if stage in running:
+                self.conn.execute("UPDATE lists SET enrichment_status = ? WHERE id = ?", (status, self.list_id))
+                return
+
+    def _finish(self, key, website, socials=None, emails=None, failed=False):
+        """Store a company's result and fan it out to its leads.
+
+        failed marks a result missing a stage that errored: it is stored
+        with the "error" status, so the company is retried after
+        CACHE_TTL_ERROR rather than kept as found or as nothing found.
+        """
+        company = self.companies[key]
+        result = {"website": website or "", "email": emails[0] if emails else ""}
+        for pk, dk in zip(SOCIAL_PLATFORM_KEYS, SOCIAL_DB_KEYS):
+            result[dk] = (socials or {}).get(pk, "")
+        if failed:
+            status = "error"
+        else:
+            status = "ok" if any(result.values()) else "empty"
+        _save_company(self.conn, key, company["name"], result, status)
+        _fan_out(self.conn, company["lead_ids"], result, overwrite=self.revalidate)
+        self.checkpoint.mark("company", company["lead_ids"])
+
+    def write_results(self):
+        """Apply stage results as they arrive. The only DB writer of the run.
+
+        A page result can arrive before or after the companies waiting on
+        it: each website keeps its result once known and the companies
+        still waiting for it.
+        """
+        missing = object()
+        websites = {key: company["website"] for key, company in self.companies.items()}
+        url_failed = set()  # companies whose URL lookup errored
+        sites = {}  # url -> {"result": page, "waiting": [company_key]}
+        pending = 0
+
+        def finish_page(key, url, page):
+            self._finish(key, url, page["socials"], page["emails"], page["failed"] or key in url_failed)
+
+        while self.running:
+            msg = self.write_q.get()
+            kind = msg[0]
+
+            if kind == "url":
+                _, key, url, failed = msg
+                websites[key] = url
+                if failed:
+                    url_failed.add(key)
+            elif kind == "site":
+                _, url, key = msg
+                site = sites.setdefault(url, {"result": missing, "waiting": []})
+                if site["result"] is missing:
+                    site["waiting"].append(key)
+                else:
+                    finish_page(key, url, site["result"])
+            elif kind == "page":
+                _, url, page = msg
+                site = sites.setdefault(url, {"result": missing, "waiting": []})
+                site["result"] = page
+                for key in site["waiting"]:
+                    finish_page(key, url, page)
+                site["waiting"] = []
+            elif kind == "emails":
+                _, key, emails, failed = msg
+                self._finish(key, websites[key], emails=emails, failed=failed or key in url_failed)
+            elif kind == "finish":
+                key = msg[1]
+                self._finish(key, websites[key], failed=key in url_failed)
+            elif kind == "stage_done":
+                self.running.discard(msg[1])
+                self._set_status(self.running)
+
+            pending += 1
+            if pending >= 10 or self.write_q.empty():
+                self.conn.commit()
+                pending = 0
+
+        self.conn.commit()
+
+
+def group_companies(conn, leads, revalidate, done=()):
+    """Group leads by company and fan out stored results that are still fresh.
+
+    Returns the companies that still need enriching, keyed by company_key.
+    Leads in done (already checkpointed) are left out.
+    """
+    companies = {}
+    for lead in leads:
+        if lead["id"] in done:
+            continue
+        name = lead["company"] or lead["name"]
+        key = company_key(name)
+        if not key:
+            continue
+        company = companies.setdefault(key, {"name": name, "website": "", "lead_ids": [], "needs_email": revalidate})
+        company["lead_ids"].append(lead["id"])
+        if not company["website"]:
+            company["website"] = lead["company_website"] or ""
+        if not lead["email"]:
+            company["needs_email"] = True
+
+    if revalidate or not companies:
+        return companies
+
+    stored = conn.execute(
+        "SELECT * FROM company_enrichment WHERE company_key IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(companies)),),
+    ).fetchall()
+    for row in stored:
+        if _is_fresh(row):
+            company = companies.pop(row["company_key"])
+            result = {c: row[c] or "" for c in ["website", "email"] + SOCIAL_DB_KEYS}
+            _fan_out(conn, company["lead_ids"], result)
+    return companies
+
+
+def enrich_list(list_id, revalidate=False, job_id=None):
+    """Run the full enrichment pipeline for a list's leads.
+
+    Companies already enriched (for any list) are reused until their result
+    passes the cache TTL. Cached lookups are likewise reused until they pass
+    the TTL for their status (found / nothing found / failed). With
+    revalidate, stored company results are recomputed, failed lookups are
+    retried regardless of age and leads that already have an email or
+    socials are refreshed too - but only stale or failed entries hit the
+    network, so a repeat run costs a fraction of a cold one.
+
+    job_id enables per-lead checkpoints for resuming an interrupted job.
+    """
+    conn = sqlite3.connect(config.DATABASE, timeout=30)
     conn.row_factory = sqlite3.Row
+    checkpoint = Checkpoint(conn, job_id)
 
     try:
-        # Get leads in this list that need enrichment
         leads = conn.execute(
-            """SELECT l.id, l.nmlsid, l.name, l.company, l.company_website
+            """SELECT l.id, l.name, l.company, l.company_website, l.email
                FROM leads l
                JOIN list_leads ll ON l.id = ll.lead_id
                WHERE ll.list_id = ?""",
             (list_id,),
         ).fetchall()
 
-        total = len(leads)
-        if total == 0:
+        if not leads:
             conn.execute("UPDATE lists SET enrichment_status = 'complete' WHERE id = ?", (list_id,))
             conn.commit()
             return
 
-        # Stage 1: URL lookup for leads without websites
         conn.execute("UPDATE lists SET enrichment_status = 'enriching_urls' WHERE id = ?", (list_id,))
+        companies = group_companies(conn, leads, revalidate, done=checkpoint.done("company"))
         conn.commit()
 
-        needs_url = [l for l in leads if not l["company_website"]]
-        if needs_url:
-            try:
-                from lookup_urls import search_company_url, load_cache as load_url_cache, save_cache as save_url_cache
-
-                url_cache = load_url_cache()
-                for i, lead in enumerate(needs_url):
-                    company = lead["company"] or lead["name"]
-                    if company not in url_cache:
-                        url = search_company_url(company)
-                        url_cache[company] = url
-                        time.sleep(1.5)
-                    else:
-                        url = url_cache[company]
-
-                    if url:
-                        conn.execute("UPDATE leads SET company_website = ? WHERE id = ?", (url, lead["id"]))
-
-                    if (i + 1) % 10 == 0:
-                        save_url_cache(url_cache)
-                        conn.commit()
-
-                save_url_cache(url_cache)
-                conn.commit()
-            except Exception as e:
-                print(f"URL enrichment error: {e}")
-
-        # Refresh leads data after URL enrichment
-        leads = conn.execute(
-            """SELECT l.id, l.nmlsid, l.name, l.company, l.company_website
-               FROM leads l
-               JOIN list_leads ll ON l.id = ll.lead_id
-               WHERE ll.list_id = ?""",
-            (list_id,),
-        ).fetchall()
-
-        # Stage 2: Social media scraping
-        conn.execute("UPDATE lists SET enrichment_status = 'enriching_socials' WHERE id = ?", (list_id,))
-        conn.commit()
-
-        needs_socials = [l for l in leads if l["company_website"]]
-        if needs_socials:
-            try:
-                from scrape_socials import scrape_website, load_cache as load_social_cache, save_cache as save_social_cache
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-                social_cache = load_social_cache()
-                platform_keys = ["facebook", "linkedin", "instagram", "twitter", "youtube", "tiktok"]
-                db_keys = ["facebook", "linkedin", "instagram", "twitter_x", "youtube", "tiktok"]
-
-                for i, lead in enumerate(needs_socials):
-                    url = lead["company_website"]
-                    if url not in social_cache:
-                        socials = scrape_website(url)
-                        social_cache[url] = socials
-                        time.sleep(1.0)
-                    else:
-                        socials = social_cache[url]
-
-                    for pk, dk in zip(platform_keys, db_keys):
-                        val = socials.get(pk, "")
-                        if val:
-                            conn.execute(f"UPDATE leads SET {dk} = ? WHERE id = ? AND ({dk} IS NULL OR {dk} = '')", (val, lead["id"]))
-
-                    if (i + 1) % 10 == 0:
-                        save_social_cache(social_cache)
-                        conn.commit()
-
-                save_social_cache(social_cache)
-                conn.commit()
-            except Exception as e:
-                print(f"Social enrichment error: {e}")
-
-        # Stage 3: Email scraping
-        conn.execute("UPDATE lists SET enrichment_status = 'enriching_emails' WHERE id = ?", (list_id,))
-        conn.commit()
-
-        try:
-            from scrape_emails import (
-                scrape_emails_from_website, search_email_for_company,
-                load_cache as load_email_cache, save_cache as save_email_cache,
-            )
-            import urllib3
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-            email_cache = load_email_cache()
-
-            # Refresh leads for email stage
-            leads = conn.execute(
-                """SELECT l.id, l.name, l.company, l.company_website, l.email
-                   FROM leads l
-                   JOIN list_leads ll ON l.id = ll.lead_id
-                   WHERE ll.list_id = ?""",
-                (list_id,),
-            ).fetchall()
-
-            for i, lead in enumerate(leads):
-                if lead["email"]:
-                    continue
-
-                website = lead["company_website"]
-                company = lead["company"] or lead["name"]
-                key = website if website else f"__no_website__{company}"
-
-                if key not in email_cache:
-                    if website:
-                        emails = scrape_emails_from_website(website)
-                    else:
-                        emails = search_email_for_company(company)
-                    email_cache[key] = emails
-                    time.sleep(1.0)
-                else:
-                    emails = email_cache[key]
-
-                if emails:
-                    conn.execute("UPDATE leads SET email = ? WHERE id = ?", (emails[0], lead["id"]))
-
-                if (i + 1) % 10 == 0:
-                    save_email_cache(email_cache)
-                    conn.commit()
-
-            save_email_cache(email_cache)
-            conn.commit()
-        except Exception as e:
-            print(f"Email enrichment error: {e}")
+        if companies:
+            with EnrichmentRun(conn, list_id, companies, revalidate, checkpoint) as run:
+                run.run()
 
         # Mark complete
         conn.execute("UPDATE lists SET enrichment_status = 'complete' WHERE id = ?", (list_id,))
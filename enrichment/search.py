@@ -0,0 +1,184 @@
+"""
+Shared, rate-limited DuckDuckGo search client.
+
+Every search in the app (company URL lookup, email search for companies
+without a website) goes through one SearchClient per process:
+
+- Sessions are reused: the backend keeps one DDGS client per thread instead
+  of building a new one for every query.
+- A token bucket paces queries across all threads and jobs.
+- The rate adapts (AIMD): each successful query nudges it up by
+  SEARCH_RATE_STEP towards SEARCH_MAX_RATE; a throttled query halves it,
+  pauses all searching for an exponentially growing backoff, and retries.
+  Throughput settles just under the rate DuckDuckGo tolerates.
+- batch() runs many lookups with bounded concurrency.
+
+ddgs 9 folds every engine outcome into DDGSException: a query that finds
+nothing raises DDGSException("No results found."), a slow or stalled
+engine TimeoutException, and other failures carry the engine's error text.
+The client maps these back: no results is an empty list (cached as
+"nothing found"), a timeout or rate-limit text (or RatelimitException) is
+throttling, and anything else is raised to the caller, so a failed search
+is cached as an error instead of as "nothing found".
+
+The backend is injectable: anything with text(query, max_results) that
+raises like DDGS.text (see benchmarks/bench_search.py for a fake one).
+"""
+
+import random
+import re
+import threading
+import time
+
+from ddgs import DDGS
+from ddgs.exceptions import DDGSException, RatelimitException, TimeoutException
+
+import config
+from enrichment.fetcher import FetchEngine
+
+NO_RESULTS = "No results found."  # DDGSException text when every engine came back empty
+# Engine error text that means throttling: DuckDuckGo answers 202 or 429
+THROTTLED_TEXT = re.compile(r"rate ?limit|too many requests|\b(?:202|429)\b", re.IGNORECASE)
+
+
+def _is_throttled(exc):
+    """True if a ddgs error means the search engine is holding us off."""
+    if isinstance(exc, (RatelimitException, TimeoutException)):
+        return True
+    return bool(THROTTLED_TEXT.search(str(exc)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket with an adjustable rate and a pause switch."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds` and drop any saved-up burst."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+            self._updated = time.monotonic()
+
+
+class DDGSBackend:
+    """Real DuckDuckGo backend with one reusable DDGS client per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def text(self, query, max_results):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = DDGS()
+        return client.text(query, max_results=max_results)
+
+
+class SearchClient:
+    """Rate-limited, adaptive search client. Safe to share between threads."""
+
+    def __init__(self, backend=None, rate=None, max_rate=None, min_rate=None,
+                 rate_step=None, burst=None, max_workers=None, max_retries=None, backoff=None):
+        self.backend = backend or DDGSBackend()
+        self.max_rate = max_rate or config.SEARCH_MAX_RATE
+        self.min_rate = min_rate or config.SEARCH_MIN_RATE
+        self.rate_step = rate_step or config.SEARCH_RATE_STEP
+        self.max_workers = max_workers or config.SEARCH_WORKERS
+        self.max_retries = config.SEARCH_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = config.SEARCH_BACKOFF if backoff is None else backoff
+        self.bucket = TokenBucket(rate or config.SEARCH_RATE, burst or config.SEARCH_BURST)
+        self._lock = threading.Lock()
+        self._strikes = 0  # consecutive rate-limit responses
+        self.throttled = 0  # total rate-limit responses, for reporting
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def _on_success(self):
+        with self._lock:
+            self._strikes = 0
+            self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.rate_step))
+
+    def _on_throttle(self):
+        with self._lock:
+            self._strikes += 1
+            self.throttled += 1
+            self.bucket.set_rate(max(self.min_rate, self.bucket.rate / 2))
+            delay = self.backoff * 2 ** (self._strikes - 1)
+            self.bucket.pause(delay * random.uniform(0.8, 1.2))
+
+    def text(self, query, max_results=8):
+        """Run one text search, retrying with backoff when throttled.
+
+        Returns [] when the search found nothing.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                results = self.backend.text(query, max_results=max_results)
+            except DDGSException as e:
+                if str(e) == NO_RESULTS:
+                    results = []
+                elif _is_throttled(e):
+                    self._on_throttle()
+                    if attempt == self.max_retries:
+                        raise
+                    continue
+                else:
+                    raise
+            self._on_success()
+            return list(results or [])
+
+    def batch(self, fn, items):
+        """Apply fn to every item, at most max_workers at a time.
+
+        fn is expected to search through this client, which does the
+        pacing. Yields (item, result) in completion order; an item whose fn
+        raised is logged and yields None.
+        """
+        engine = FetchEngine(max_workers=self.max_workers, per_host=self.max_workers, host_delay=0)
+        return engine.run(fn, items, key=lambda item: "search")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide SearchClient, so every caller shares one rate limit."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient()
+        return _client
@@ -0,0 +1,184 @@
+"""
+Pooled, keep-alive HTTP client shared by every scraper (requests, or httpx
+with HTTP/2 when HTTP2=1 and httpx[http2] is installed).
+fetch_page() streams an HTML body, capped in size and time, and can fetch
+conditionally with a saved ETag / Last-Modified.
+"""
+
+import itertools
+import re
+import threading
+import time
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+REQUEST_TIMEOUT = 10  # seconds
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Markup that marks an unlabelled body as HTML, looked for in its first SNIFF_BYTES
+HTML_MARKERS = (b"<!doctype html", b"<html", b"<head", b"<body")
+SNIFF_BYTES = 1024
+
+CHUNK_SIZE = 16 * 1024
+BODY_END = re.compile(rb"</body\s*>", re.IGNORECASE)
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+
+def _requests_session():
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.verify = False  # Some mortgage sites have bad certs
+    adapter = HTTPAdapter(
+        pool_connections=config.HTTP_POOL_HOSTS,
+        pool_maxsize=config.HTTP_POOL_PER_HOST,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _httpx_client():
+    import httpx
+
+    return httpx.Client(
+        http2=True,
+        headers=HEADERS,
+        verify=False,
+        follow_redirects=True,
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=config.HTTP_POOL_HOSTS * config.HTTP_POOL_PER_HOST,
+            max_keepalive_connections=config.HTTP_POOL_HOSTS,
+        ),
+    )
+
+
+def new_client():
+    """Build a pooled client: httpx with HTTP/2 if enabled and available."""
+    if config.HTTP2:
+        try:
+            import h2  # noqa: F401 - httpx needs it for http2=True
+            return _httpx_client()
+        except ImportError:
+            print("HTTP2 requested but httpx[http2] is not installed; using requests")
+    return _requests_session()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide pooled HTTP client."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = new_client()
+        return _client
+
+
+def _media_type(content_type):
+    return content_type.split(";")[0].strip().lower()
+
+
+def _looks_like_html(first_bytes):
+    """Sniff a body sent without a Content-Type."""
+    head = first_bytes[:SNIFF_BYTES].lower()
+    return any(marker in head for marker in HTML_MARKERS)
+
+
+def _read_capped(chunks, max_bytes, deadline):
+    """Join chunks until </body>, the byte cap or the deadline, whichever is first."""
+    chunks = iter(chunks)
+    buf = bytearray()
+    for chunk in chunks:
+        # Look for </body> across the chunk boundary too
+        search_from = max(len(buf) - 8, 0)
+        buf += chunk
+        if BODY_END.search(buf, search_from):
+            # Drain a short tail (usually just "</html>") so the connection
+            # can go back to the pool instead of being dropped
+            tail = 0
+            for rest in chunks:
+                tail += len(rest)
+                if tail > 4 * CHUNK_SIZE:
+                    break
+            break
+        if len(buf) >= max_bytes or time.monotonic() > deadline:
+            break
+    return bytes(buf[:max_bytes])
+
+
+class Page(NamedTuple):
+    html: str  # "" for non-HTML responses and 304s
+    etag: str  # validators from the response, for the next conditional fetch
+    last_modified: str
+    not_modified: bool  # the server answered 304 to a conditional request
+
+
+def _conditional_headers(etag, last_modified):
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def _page(resp, chunks, max_bytes, deadline, encoding):
+    etag = resp.headers.get("ETag", "")
+    last_modified = resp.headers.get("Last-Modified", "")
+    if resp.status_code == 304:
+        return Page("", etag, last_modified, True)
+    resp.raise_for_status()
+    media_type = _media_type(resp.headers.get("Content-Type", ""))
+    if not media_type:
+        chunks = iter(chunks)
+        first = next(chunks, b"")
+        if not _looks_like_html(first):
+            return Page("", etag, last_modified, False)
+        chunks = itertools.chain([first], chunks)
+    elif media_type not in HTML_CONTENT_TYPES:
+        return Page("", etag, last_modified, False)
+    body = _read_capped(chunks, max_bytes, deadline)
+    return Page(body.decode(encoding or "utf-8", errors="replace"), etag, last_modified, False)
+
+
+def fetch_page(url, etag="", last_modified="", timeout=REQUEST_TIMEOUT, max_bytes=None):
+    """Stream a page through the shared pool, conditionally if validators are given.
+
+    Returns a Page; raises for connection errors and HTTP error codes.
+    """
+    max_bytes = max_bytes or config.HTTP_MAX_BYTES
+    deadline = time.monotonic() + config.HTTP_READ_DEADLINE
+    headers = _conditional_headers(etag, last_modified)
+    client = get_client()
+
+    if isinstance(client, requests.Session):
+        resp = client.get(url, headers=headers, timeout=timeout, stream=True)
+        try:
+            return _page(resp, resp.iter_content(CHUNK_SIZE), max_bytes, deadline, resp.encoding)
+        finally:
+            resp.close()
+    with client.stream("GET", url, headers=headers, timeout=timeout) as resp:
+        return _page(resp, resp.iter_bytes(CHUNK_SIZE), max_bytes, deadline, resp.charset_encoding)
+
+
+def fetch_html(url, timeout=REQUEST_TIMEOUT, max_bytes=None):
+    """Stream a page's HTML through the shared pool, bounded in size and time.
+
+    Returns "" for responses that are not HTML; raises for connection errors
+    and HTTP error codes.
+    """
+    return fetch_page(url, timeout=timeout, max_bytes=max_bytes).html
@@ -0,0 +1,65 @@
+"""
+Export leads, outreach logs or session history for analytics.
+
+Writes one of exporter.DATASETS as newline-delimited JSON (default), CSV or
+Parquet (needs pyarrow), streaming from the database a chunk at a time.
+Lead volumes come as integer dollar amounts next to the display strings.
+
+Usage:
+    python export_data.py leads
+    python export_data.py outreach_logs --format parquet -o logs.parquet
+    python export_data.py sessions --format csv --gzip
+"""
+
+import argparse
+import sys
+
+from exporter import (
+    DATASETS, FORMATS, csv_chunks, dataset_sql, fetch_chunks, gzip_chunks, ndjson_chunks,
+    parquet_available, write_parquet,
+)
+
+
+def export_data(dataset, fmt="ndjson", output=None, gzip=False):
+    """Write a dataset to a file and return (path, rows written)."""
+    path = output or dataset + FORMATS[fmt] + (".gz" if gzip and fmt != "parquet" else "")
+    count = 0
+
+    def counted(chunks):
+        nonlocal count
+        yield next(chunks)
+        for rows in chunks:
+            count += len(rows)
+            yield rows
+
+    chunks = counted(fetch_chunks(dataset_sql(dataset, as_json=fmt == "ndjson")))
+    if fmt == "parquet":
+        write_parquet(chunks, dataset, path)
+        return path, count
+
+    data = csv_chunks(chunks) if fmt == "csv" else ndjson_chunks(chunks)
+    if gzip:
+        data = gzip_chunks(data)
+    with open(path, "wb") as f:
+        for block in data:
+            f.write(block)
+    return path, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("--format", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("-o", "--output", help="output file (default: <dataset>.<format>)")
+    parser.add_argument("--gzip", action="store_true", help="gzip csv/ndjson output")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not parquet_available():
+        sys.exit("Parquet export needs pyarrow: pip install pyarrow")
+
+    path, count = export_data(args.dataset, args.format, args.output, args.gzip)
+    print(f"Exported {count} {args.dataset} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
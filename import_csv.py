@@ -3,11 +3,11 @@ Seed the SQLite database from the enriched CSV file.
 Creates a default list called "All TX Non-QM Brokers" with all leads.
 """
 
-import csv
 import sqlite3
 import os
 import config
 from models import init_db
+from importer import LeadImporter, UploadReader, map_columns
 
 INPUT_CSV = "TX-NON-Qm-Lending-Brokers-Final.csv"
 
@@ -58,71 +58,29 @@ XLSX_COLUMN_MAP = {
 def import_csv(csv_path=INPUT_CSV):
     init_db()
 
-    with open(csv_path, "r", encoding="utf-8-sig") as f:
-        reader = csv.reader(f)
-        header = next(reader)
-        rows = list(reader)
-
-    # Build index mapping: CSV column index -> DB column name
-    col_indices = {}
-    for csv_col, db_col in COLUMN_MAP.items():
-        if csv_col in header:
-            col_indices[header.index(csv_col)] = db_col
-
     conn = sqlite3.connect(config.DATABASE)
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
 
-    sorted_indices = sorted(col_indices.keys())
-    db_columns = [col_indices[idx] for idx in sorted_indices]
-    placeholders = ", ".join(["?"] * len(db_columns))
-    col_names = ", ".join(db_columns)
-
-    # Upsert: insert or update existing by nmlsid
-    update_cols = [c for c in db_columns if c != "nmlsid"]
-    update_set = ", ".join(f"{c} = excluded.{c}" for c in update_cols)
-
-    insert_sql = f"""
-        INSERT INTO leads ({col_names})
-        VALUES ({placeholders})
-        ON CONFLICT(nmlsid) DO UPDATE SET {update_set}
-    """
-
-    lead_count = 0
-    lead_ids = []
-
-    for row in rows:
-        values = []
-        for idx in sorted(col_indices.keys()):
-            val = row[idx] if idx < len(row) else ""
-            values.append(val)
-
-        try:
-            cur = conn.execute(insert_sql, values)
-            # Get the lead id
-            nmlsid_val = row[header.index("NMLSID")] if "NMLSID" in header else ""
-            cur2 = conn.execute("SELECT id FROM leads WHERE nmlsid = ?", (nmlsid_val,))
-            lead_row = cur2.fetchone()
-            if lead_row:
-                lead_ids.append(lead_row[0])
-            lead_count += 1
-        except Exception as e:
-            print(f"  Error importing row: {e}")
-
-    # Create default list
-    conn.execute(
-        "INSERT OR IGNORE INTO lists (name, filename, row_count, enrichment_status) VALUES (?, ?, ?, ?)",
-        ("All TX Non-QM Brokers", csv_path, lead_count, "complete"),
-    )
-    list_row = conn.execute("SELECT id FROM lists WHERE name = ?", ("All TX Non-QM Brokers",)).fetchone()
-    list_id = list_row[0]
-
-    # Link all leads to this list
-    for lead_id in lead_ids:
+    with UploadReader(csv_path) as reader:
+        # Build index mapping: CSV column index -> DB column name
+        col_indices = map_columns(reader.header, COLUMN_MAP)
+
+        # Create default list
         conn.execute(
-            "INSERT OR IGNORE INTO list_leads (list_id, lead_id) VALUES (?, ?)",
-            (list_id, lead_id),
+            "INSERT OR IGNORE INTO lists (name, filename, row_count, enrichment_status) VALUES (?, ?, ?, ?)",
+            ("All TX Non-QM Brokers", csv_path, reader.total_rows, "complete"),
         )
+        list_row = conn.execute("SELECT id FROM lists WHERE name = ?", ("All TX Non-QM Brokers",)).fetchone()
+        list_id = list_row[0]
+
+        # Upsert rows and link them to the list in set-based batches
+        importer = LeadImporter(conn, col_indices, list_id)
+        for batch in reader:
+            importer.add_rows(batch)
+            importer.flush()
+        lead_count = importer.finish()
+    conn.execute("UPDATE lists SET row_count = ? WHERE id = ?", (lead_count, list_id))
 
     conn.commit()
 
@@ -132,7 +90,7 @@ def import_csv(csv_path=INPUT_CSV):
     conn.close()
 
     print(f"Imported {lead_count} leads into database")
-    print(f"Created list 'All TX Non-QM Brokers' with {len(lead_ids)} leads")
+    print(f"Created list 'All TX Non-QM Brokers' with {lead_count} leads")
     return lead_count
 
 
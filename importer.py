@@ -0,0 +1,279 @@
+"""
+Bulk, set-based lead import shared by the upload route and import_csv.
+
+Rows are staged into a temp table with executemany, then merged into
+`leads` with a single INSERT ... SELECT upsert. Lead ids are resolved and
+list membership is linked with one set-based statement each, instead of
+an upsert + SELECT + INSERT round-trip per row.
+
+Uploads are read as a stream of row batches (UploadReader) and imported off
+the request thread by import_upload(), which commits after every batch and
+records progress on the list so /api/lists/<id>/status can report it.
+Memory use stays bounded by the batch size whatever the file size. The
+committed progress doubles as a checkpoint: a requeued import job skips the
+rows it already imported.
+"""
+
+import csv
+import io
+import os
+import sqlite3
+from operator import itemgetter
+
+import config
+from models import VOLUME_AMOUNTS, bump_stats_version, parse_amount
+
+
+def _cell_to_str(val):
+    if val is None:
+        return ""
+    if isinstance(val, float) and val == int(val):
+        return str(int(val))
+    return str(val)
+
+
+def estimate_csv_rows(filepath, sample_size=64 * 1024):
+    """Data rows in a CSV file, from the average row length of its first sample_size bytes.
+
+    Exact when the whole file fits in the sample.
+    """
+    size = os.path.getsize(filepath)
+    with open(filepath, "rb") as f:
+        sample = f.read(sample_size)
+    if len(sample) < size:
+        sample = sample.rsplit(b"\n", 1)[0] + b"\n"  # whole rows only
+    text = sample.decode("utf-8-sig", errors="replace")
+    rows = sum(1 for _ in csv.reader(io.StringIO(text, newline="")))
+    if len(sample) < size:
+        rows = round(rows * size / len(sample))
+    return max(rows - 1, 0)
+
+
+class UploadReader:
+    """Stream a CSV or XLSX file as batches of rows (lists of strings).
+
+    Usage:
+        with UploadReader(filepath) as reader:
+            header = reader.header
+            for batch in reader:
+                ...
+
+    total_rows is an estimate for progress reporting: the worksheet
+    dimension for XLSX, estimate_csv_rows() for CSV.
+    """
+
+    def __init__(self, filepath, batch_size=None):
+        self.filepath = filepath
+        self.batch_size = batch_size or config.IMPORT_BATCH_SIZE
+        self._wb = None
+        self._file = None
+
+        if os.path.splitext(filepath)[1].lower() == ".xlsx":
+            from openpyxl import load_workbook
+
+            self._wb = load_workbook(filepath, read_only=True, data_only=True)
+            ws = self._wb.active
+            self._rows = ([_cell_to_str(v) for v in row] for row in ws.iter_rows(values_only=True))
+            self.header = next(self._rows)
+            self.total_rows = max((ws.max_row or 1) - 1, 0)
+        else:
+            self.total_rows = estimate_csv_rows(filepath)
+            self._file = open(filepath, "r", encoding="utf-8-sig", newline="")
+            self._rows = csv.reader(self._file)
+            self.header = next(self._rows)
+
+    def __iter__(self):
+        batch = []
+        for row in self._rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def pick_column_map(header):
+    """Auto-detect which column map has more header matches."""
+    from import_csv import COLUMN_MAP, XLSX_COLUMN_MAP
+
+    csv_hits = sum(1 for col in COLUMN_MAP if col in header)
+    xlsx_hits = sum(1 for col in XLSX_COLUMN_MAP if col in header)
+
+    return XLSX_COLUMN_MAP if xlsx_hits > csv_hits else COLUMN_MAP
+
+
+def map_columns(header, column_map):
+    """Map file column index -> DB column name for the headers we know."""
+    col_indices = {}
+    for file_col, db_col in column_map.items():
+        if file_col in header:
+            col_indices[header.index(file_col)] = db_col
+    return col_indices
+
+
+class LeadImporter:
+    """Stage rows and merge them into leads + list_leads in bulk.
+
+    Usage:
+        importer = LeadImporter(conn, col_indices, list_id)
+        importer.add_rows(rows)
+        count = importer.finish()
+        conn.commit()
+
+    col_indices must include a column mapped to "nmlsid". clean(db_col, val)
+    may rewrite each value before it is staged. Volume columns are stored
+    as given, along with their exact dollar amounts (models.VOLUME_AMOUNTS),
+    and units as integers. Nothing is committed here; the caller owns the
+    transaction.
+    """
+
+    def __init__(self, conn, col_indices, list_id, clean=None):
+        self.conn = conn
+        self.list_id = list_id
+        self.clean = clean
+        self.indices = sorted(col_indices)
+        self.columns = [col_indices[idx] for idx in self.indices]
+        self._pick = itemgetter(*self.indices) if len(self.indices) > 1 else lambda row: (row[self.indices[0]],)
+        self.nmlsid_pos = self.columns.index("nmlsid")
+        self.staged = 0
+        # (position of a volume column, position of its amount) and units positions
+        self.amounts = []
+        for text_col, amount_col in VOLUME_AMOUNTS.items():
+            if text_col in self.columns:
+                self.columns.append(amount_col)
+                self.amounts.append((self.columns.index(text_col), len(self.columns) - 1))
+        self.counts = [pos for pos, col in enumerate(self.columns) if col in ("units", "monthly_units")]
+        typed = set(VOLUME_AMOUNTS.values()) | {"units", "monthly_units"}
+
+        col_defs = ", ".join(f"{c} {'INTEGER' if c in typed else 'TEXT'}" for c in self.columns)
+        conn.execute("DROP TABLE IF EXISTS temp.staged_leads")
+        conn.execute(f"CREATE TEMP TABLE staged_leads (seq INTEGER PRIMARY KEY, {col_defs})")
+
+    def _values(self, row):
+        if len(row) > self.indices[-1]:
+            raw = self._pick(row)
+        else:
+            raw = [row[idx] if idx < len(row) else "" for idx in self.indices]
+        # Clean "None" string values from XLSX
+        values = ["" if val is None or val == "None" else val for val in raw]
+        if self.clean:
+            values = [self.clean(db_col, val) for db_col, val in zip(self.columns, values)]
+        values[self.nmlsid_pos] = values[self.nmlsid_pos].strip()
+        for pos in self.counts:
+            values[pos] = parse_amount(values[pos])
+        values.extend(parse_amount(values[pos]) for pos, _ in self.amounts)
+        return values
+
+    def add_rows(self, rows):
+        """Stage a batch of raw rows. Rows with a blank NMLSID are skipped."""
+        batch = [v for v in map(self._values, rows) if v[self.nmlsid_pos]]
+        placeholders = ", ".join(["?"] * len(self.columns))
+        self.conn.executemany(
+            f"INSERT INTO staged_leads ({', '.join(self.columns)}) VALUES ({placeholders})",
+            batch,
+        )
+        self.staged += len(batch)
+
+    def flush(self):
+        """Merge staged rows into leads and list_leads, then clear the stage."""
+        col_names = ", ".join(self.columns)
+        update_cols = [c for c in self.columns if c != "nmlsid"]
+        if update_cols:
+            conflict = "DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in update_cols)
+        else:
+            conflict = "DO NOTHING"
+
+        # Upsert: insert or update existing by nmlsid ("WHERE true" keeps
+        # SQLite from parsing ON CONFLICT as part of the SELECT)
+        self.conn.execute(
+            f"""INSERT INTO leads ({col_names})
+                SELECT {col_names} FROM staged_leads WHERE true ORDER BY seq
+                ON CONFLICT(nmlsid) {conflict}"""
+        )
+        self.conn.execute(
+            """INSERT OR IGNORE INTO list_leads (list_id, lead_id)
+               SELECT ?, l.id FROM staged_leads s JOIN leads l ON l.nmlsid = s.nmlsid""",
+            (self.list_id,),
+        )
+
+        # For company-level imports (XLSX): copy company name to name field if not mapped
+        if "company" in self.columns and "name" not in self.columns:
+            self.conn.execute(
+                """UPDATE leads SET name = company
+                   WHERE (name IS NULL OR name = '')
+                   AND nmlsid IN (SELECT nmlsid FROM staged_leads)"""
+            )
+        self.conn.execute("DELETE FROM staged_leads")
+        bump_stats_version(self.conn)
+
+    def finish(self):
+        """Flush remaining rows and return the number of leads in the list."""
+        self.flush()
+        self.conn.execute("DROP TABLE IF EXISTS temp.staged_leads")
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM list_leads WHERE list_id = ?", (self.list_id,)
+        ).fetchone()[0]
+
+
+def import_upload(list_id, filepath):
+    """Import an uploaded file into a list, batch by batch.
+
+    Runs as a background job with its own connection. Each batch is
+    committed along with the list's imported_rows counter, and a rerun
+    resumes after the last committed batch. The list ends with
+    import_status 'complete' (row_count = leads linked) or 'error'.
+    """
+    conn = sqlite3.connect(config.DATABASE, timeout=30)
+    conn.execute("PRAGMA foreign_keys=ON")
+
+    try:
+        imported = conn.execute(
+            "SELECT imported_rows FROM lists WHERE id = ?", (list_id,)
+        ).fetchone()[0] or 0
+        skip = imported
+
+        with UploadReader(filepath) as reader:
+            col_indices = map_columns(reader.header, pick_column_map(reader.header))
+            importer = LeadImporter(conn, col_indices, list_id)
+
+            for batch in reader:
+                if skip >= len(batch):
+                    skip -= len(batch)
+                    continue
+                batch, skip = batch[skip:], 0
+                importer.add_rows(batch)
+                importer.flush()
+                imported += len(batch)
+                # row_count started as an estimate: keep it at least what was imported
+                conn.execute(
+                    "UPDATE lists SET imported_rows = ?, row_count = MAX(row_count, ?) WHERE id = ?",
+                    (imported, imported, list_id),
+                )
+                conn.commit()
+
+            lead_count = importer.finish()
+        conn.execute(
+            "UPDATE lists SET row_count = ?, import_status = 'complete' WHERE id = ?",
+            (lead_count, list_id),
+        )
+        conn.commit()
+    except Exception as e:
+        print(f"Import error: {e}")
+        conn.rollback()
+        conn.execute("UPDATE lists SET import_status = 'error' WHERE id = ?", (list_id,))
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,259 @@
+"""
+Persistent background job queue for list imports and enrichment.
+
+Jobs are rows in the `jobs` table, so a queued or half-finished job survives
+a gunicorn worker being recycled. Each app process runs one JobScheduler
+that claims queued jobs, with at most JOB_WORKERS running at once across
+all processes. Running jobs heartbeat; on startup (and periodically) a
+recovery sweep requeues jobs whose heartbeat went stale and re-creates jobs
+for lists left stuck mid-import or mid-enrichment.
+
+Handlers checkpoint their progress (per lead for enrichment, per batch for
+imports), so a requeued job resumes where it stopped.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+
+def _connect():
+    conn = sqlite3.connect(config.DATABASE, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def enqueue(conn, kind, list_id, params=None, commit=True):
+    """Queue a job, commit, then wake the local scheduler.
+
+    The scheduler claims jobs on its own connection, so it only sees the
+    job once committed. With commit=False the caller commits and then
+    calls scheduler.wake() itself.
+    """
+    cur = conn.execute(
+        "INSERT INTO jobs (kind, list_id, params) VALUES (?, ?, ?)",
+        (kind, list_id, json.dumps(params or {})),
+    )
+    if commit:
+        conn.commit()
+        scheduler.wake()
+    return cur.lastrowid
+
+
+class Checkpoint:
+    """Per-lead progress markers for one job, stored in job_checkpoints.
+
+    mark() writes through the caller's connection without committing, so
+    checkpoints commit atomically with the lead updates they describe.
+    Without a job_id every method is a no-op.
+    """
+
+    def __init__(self, conn, job_id=None):
+        self.conn = conn
+        self.job_id = job_id
+
+    def done(self, stage):
+        if self.job_id is None:
+            return set()
+        rows = self.conn.execute(
+            "SELECT lead_id FROM job_checkpoints WHERE job_id = ? AND stage = ?",
+            (self.job_id, stage),
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark(self, stage, lead_ids):
+        if self.job_id is None:
+            return
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO job_checkpoints (job_id, stage, lead_id) VALUES (?, ?, ?)",
+            [(self.job_id, stage, lead_id) for lead_id in lead_ids],
+        )
+
+
+def _run_enrich(job, params):
+    from enrichment.pipeline import enrich_list
+    enrich_list(job["list_id"], revalidate=params.get("revalidate", False), job_id=job["id"])
+
+
+def _run_import(job, params):
+    from importer import import_upload
+    import_upload(job["list_id"], params["filepath"])
+
+
+HANDLERS = {
+    "enrich": _run_enrich,
+    "import": _run_import,
+}
+
+
+class JobScheduler:
+    """In-process dispatcher with bounded global concurrency."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._running = set()
+        self._thread = None
+        self._pool = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        recover()
+        self._pool = ThreadPoolExecutor(max_workers=config.JOB_WORKERS)
+        self._thread = threading.Thread(target=self._loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _loop(self):
+        last_sweep = time.time()
+        while True:
+            self._wake.wait(config.JOB_POLL_INTERVAL)
+            self._wake.clear()
+            try:
+                self._heartbeat()
+                if time.time() - last_sweep > config.JOB_STALE_AFTER:
+                    recover()
+                    last_sweep = time.time()
+                while True:
+                    job = self._claim()
+                    if job is None:
+                        break
+                    with self._lock:
+                        self._running.add(job["id"])
+                    self._pool.submit(self._execute, job)
+            except Exception as e:
+                print(f"Job scheduler error: {e}")
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running, if a slot is free."""
+        conn = _connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            stale_before = time.time() - config.JOB_STALE_AFTER
+            running = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND heartbeat_at > ?",
+                (stale_before,),
+            ).fetchone()[0]
+            job = None
+            if running < config.JOB_WORKERS:
+                job = conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1"
+                ).fetchone()
+            if job is not None:
+                conn.execute(
+                    """UPDATE jobs SET status = 'running', attempts = attempts + 1, heartbeat_at = ?
+                       WHERE id = ?""",
+                    (time.time(), job["id"]),
+                )
+            conn.commit()
+            return job
+        finally:
+            conn.close()
+
+    def _heartbeat(self):
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+        conn = _connect()
+        try:
+            conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                [(time.time(), job_id) for job_id in running],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _execute(self, job):
+        status = "complete"
+        try:
+            HANDLERS[job["kind"]](job, json.loads(job["params"] or "{}"))
+        except Exception as e:
+            print(f"Job {job['id']} ({job['kind']}) failed: {e}")
+            status = "error"
+        finally:
+            with self._lock:
+                self._running.discard(job["id"])
+            conn = _connect()
+            try:
+                conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job["id"]))
+                conn.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job["id"],))
+                conn.commit()
+            finally:
+                conn.close()
+            self.wake()
+
+
+def recover():
+    """Crash-recovery sweep.
+
+    Requeues running jobs whose heartbeat went stale (their process died),
+    gives up on jobs that keep dying after JOB_MAX_ATTEMPTS, and queues a
+    fresh job for any list stuck importing or enriching with no live job.
+    """
+    conn = _connect()
+    try:
+        stale_before = time.time() - config.JOB_STALE_AFTER
+        conn.execute(
+            """UPDATE jobs SET status = 'error'
+               WHERE status = 'running' AND heartbeat_at <= ? AND attempts >= ?""",
+            (stale_before, config.JOB_MAX_ATTEMPTS),
+        )
+        conn.execute(
+            "UPDATE jobs SET status = 'queued' WHERE status = 'running' AND heartbeat_at <= ?",
+            (stale_before,),
+        )
+
+        live = "SELECT 1 FROM jobs j WHERE j.list_id = lists.id AND j.kind = ? AND j.status IN ('queued', 'running')"
+        stuck_imports = conn.execute(
+            f"SELECT id, filename FROM lists WHERE import_status = 'importing' AND NOT EXISTS ({live})",
+            ("import",),
+        ).fetchall()
+        for lst in stuck_imports:
+            filepath = os.path.join(config.UPLOAD_FOLDER_CSV, lst["filename"] or "")
+            if lst["filename"] and os.path.exists(filepath):
+                conn.execute(
+                    "INSERT INTO jobs (kind, list_id, params) VALUES ('import', ?, ?)",
+                    (lst["id"], json.dumps({"filepath": filepath})),
+                )
+            else:
+                conn.execute("UPDATE lists SET import_status = 'error' WHERE id = ?", (lst["id"],))
+
+        stuck_enrichments = conn.execute(
+            f"""SELECT id FROM lists
+                WHERE enrichment_status NOT IN ('none', 'complete', 'error')
+                AND import_status != 'importing'
+                AND NOT EXISTS ({live})""",
+            ("enrich",),
+        ).fetchall()
+        for lst in stuck_enrichments:
+            conn.execute("INSERT INTO jobs (kind, list_id) VALUES ('enrich', ?)", (lst["id"],))
+
+        # Lists whose job gave up for good
+        conn.execute(
+            """UPDATE lists SET enrichment_status = 'error'
+               WHERE enrichment_status NOT IN ('none', 'complete', 'error')
+               AND NOT EXISTS (SELECT 1 FROM jobs j WHERE j.list_id = lists.id
+                               AND j.kind = 'enrich' AND j.status IN ('queued', 'running'))"""
+        )
+        conn.execute(
+            """UPDATE lists SET import_status = 'error'
+               WHERE import_status = 'importing'
+               AND NOT EXISTS (SELECT 1 FROM jobs j WHERE j.list_id = lists.id
+                               AND j.kind = 'import' AND j.status IN ('queued', 'running'))"""
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+scheduler = JobScheduler()
@@ -1,26 +1,21 @@
 """
 Phase 1: Look up company website URLs for TX Non-QM lending brokers.
 
-Uses DuckDuckGo search (free, no API key required).
-Saves progress to a JSON cache so it can be resumed if interrupted.
+Uses DuckDuckGo search (free, no API key required) through the shared,
+rate-limited search client. Saves each lookup to the on-disk cache store so it can be resumed if interrupted.
 """
 
 import csv
-import json
-import time
-import re
 import sys
-from pathlib import Path
 from urllib.parse import urlparse
 
-from ddgs import DDGS
+from enrichment.cache import open_cache
+from enrichment.domains import DomainMatcher, load_filter, url_host
+from enrichment.search import get_client
 
 INPUT_CSV = "TX-NON-Qm-Lending-Brokers.csv"
 OUTPUT_CSV = "TX-NON-Qm-Lending-Brokers-Enriched.csv"
-CACHE_FILE = "url_cache.json"
-
-# Delay between searches to avoid rate limiting
-SEARCH_DELAY = 1.5  # seconds
+CACHE_NAMESPACE = "urls"
 
 # Domains to skip (these are aggregator/directory sites, not the company itself)
 SKIP_DOMAINS = {
@@ -33,57 +28,40 @@ SKIP_DOMAINS = {
     "companiesmarketcap.com", "zoominfo.com", "pitchbook.com",
     "sec.gov", "reddit.com", "tiktok.com",
 }
+SKIP_MATCHER = DomainMatcher(load_filter("skip_url_domains.txt", SKIP_DOMAINS))
 
 
-def load_cache() -> dict:
-    if Path(CACHE_FILE).exists():
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-
-def save_cache(cache: dict):
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+def load_cache():
+    """Open the company -> URL cache (a dict-like CacheStore)."""
+    return open_cache(CACHE_NAMESPACE)
 
 
 def is_valid_company_url(url: str) -> bool:
     """Filter out aggregator/directory sites."""
-    try:
-        domain = urlparse(url).netloc.lower()
-        # Strip www.
-        domain = re.sub(r"^www\.", "", domain)
-        for skip in SKIP_DOMAINS:
-            if domain == skip or domain.endswith("." + skip):
-                return False
-        return True
-    except Exception:
-        return False
+    domain = url_host(url)  # "" for a URL that won't parse
+    return bool(domain) and domain not in SKIP_MATCHER
 
 
 def search_company_url(company_name: str) -> str:
-    """Search DuckDuckGo for the company's official website."""
-    query = f"{company_name} mortgage company official website"
+    """Search DuckDuckGo for the company's official website.
 
-    try:
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=8))
-
-        for r in results:
-            url = r.get("href", "")
-            if is_valid_company_url(url):
-                # Return just the base domain URL
-                parsed = urlparse(url)
-                return f"{parsed.scheme}://{parsed.netloc}"
+    Returns "" when nothing was found; raises if the search itself failed.
+    """
+    query = f"{company_name} mortgage company official website"
+    results = get_client().text(query, max_results=8)
 
-        # If all results were filtered, return the first result anyway
-        if results:
-            url = results[0].get("href", "")
+    for r in results:
+        url = r.get("href", "")
+        if is_valid_company_url(url):
+            # Return just the base domain URL
             parsed = urlparse(url)
             return f"{parsed.scheme}://{parsed.netloc}"
 
-    except Exception as e:
-        print(f"  ERROR searching '{company_name}': {e}")
+    # If all results were filtered, return the first result anyway
+    if results:
+        url = results[0].get("href", "")
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
 
     return ""
 
@@ -91,7 +69,7 @@ def search_company_url(company_name: str) -> str:
 def main():
     # Load existing cache
     cache = load_cache()
-    print(f"Loaded cache with {len(cache)} entries")
+    print(f"Opened cache with {len(cache)} entries")
 
     # Read input CSV
     with open(INPUT_CSV, "r", encoding="utf-8-sig") as f:
@@ -101,29 +79,22 @@ def main():
 
     # Get unique companies
     companies = sorted(set(row[4] for row in rows if len(row) > 4))
-    remaining = [c for c in companies if c not in cache]
+    remaining = [c for c in companies if cache.needs_refresh(c, retry_errors=True)]
 
     print(f"Total unique companies: {len(companies)}")
-    print(f"Already cached: {len(companies) - len(remaining)}")
+    print(f"Fresh in cache: {len(companies) - len(remaining)}")
     print(f"Remaining to look up: {len(remaining)}")
     print()
 
-    # Look up remaining companies
-    for i, company in enumerate(remaining, 1):
-        print(f"[{i}/{len(remaining)}] Searching: {company}")
-        url = search_company_url(company)
+    # Look up remaining companies, paced by the shared search client
+    for i, (company, url) in enumerate(get_client().batch(search_company_url, remaining), 1):
+        if url is None:
+            cache.set_error(company, default="")
+            print(f"[{i}/{len(remaining)}] {company} -> SEARCH FAILED")
+            continue
         cache[company] = url
-        print(f"  -> {url or 'NOT FOUND'}")
-
-        # Save cache every 10 lookups
-        if i % 10 == 0:
-            save_cache(cache)
-            print(f"  (cache saved: {len(cache)} entries)")
-
-        time.sleep(SEARCH_DELAY)
+        print(f"[{i}/{len(remaining)}] {company} -> {url or 'NOT FOUND'}")
 
-    # Final cache save
-    save_cache(cache)
     print(f"\nAll lookups complete. Cache has {len(cache)} entries.")
 
     # Write enriched CSV
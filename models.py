@@ -1,15 +1,87 @@
+import math
 import sqlite3
 import os
 from flask import g
 import config
 
-SCHEMA = """
+
+def amount_sql(col):
+    """SQL for the dollar amount in a volume string ("$36.1M", "$850K", "36,088,923").
+
+    The SQL twin of parse_amount(), for migrating rows stored as text.
+    """
+    value = f"UPPER(TRIM({col}))"
+    digits = f"CAST(REPLACE(REPLACE(REPLACE(REPLACE({value}, '$', ''), ',', ''), 'M', ''), 'K', '') AS REAL)"
+    return f"""CASE
+        WHEN {value} = '' THEN NULL
+        WHEN {value} LIKE '%M' THEN CAST(ROUND({digits} * 1000000) AS INTEGER)
+        WHEN {value} LIKE '%K' THEN CAST(ROUND({digits} * 1000) AS INTEGER)
+        ELSE CAST(ROUND({digits}) AS INTEGER)
+    END"""
+
+
+SQLITE_INT_MIN, SQLITE_INT_MAX = -2 ** 63, 2 ** 63 - 1  # range of an SQLite INTEGER
+
+
+def parse_amount(value):
+    """Dollar amount in a volume value ("$36.1M", "$850K", "36,088,923", 1234567.0), or None.
+
+    None as well for values that aren't a finite amount an SQLite INTEGER
+    can hold ("inf", "nan", "1e30").
+    """
+    text = str(value).strip().upper().replace("$", "").replace(",", "")
+    scale = 1
+    if text.endswith("M"):
+        scale, text = 1_000_000, text[:-1]
+    elif text.endswith("K"):
+        scale, text = 1_000, text[:-1]
+    try:
+        amount = float(text) * scale
+        if not math.isfinite(amount):
+            return None
+        amount = round(amount)
+    except (ValueError, OverflowError):
+        return None
+    return amount if SQLITE_INT_MIN <= amount <= SQLITE_INT_MAX else None
+
+
+def format_money(amount):
+    """Display form of a dollar amount: $36.1M, $850K, $900. The "money" template filter."""
+    if amount is None or amount == "":
+        return ""
+    if amount >= 1_000_000:
+        return f"${amount / 1_000_000:.1f}M"
+    if amount >= 1_000:
+        return f"${amount / 1_000:.0f}K"
+    return f"${amount:,.0f}"
+
+
+# Exact dollar amount stored next to each volume column, parsed at import
+# (see importer.LeadImporter). The text columns keep what the file said;
+# sorting, range filters and display formatting use the amounts.
+VOLUME_AMOUNTS = {
+    "volume": "volume_amount",
+    "monthly_volume": "monthly_volume_amount",
+    "volume_export": "volume_export_amount",
+    "monthly_volume_export": "monthly_volume_export_amount",
+}
+
+# Typed copies of text columns the lead queries sort and filter on, computed
+# by SQLite itself so they can't drift from the source column and can be
+# indexed. VIRTUAL, so they can be added to an existing table.
+GENERATED_COLUMNS = {
+    "rank_num": "INTEGER GENERATED ALWAYS AS (CAST(NULLIF(TRIM(rank), '') AS INTEGER)) VIRTUAL",
+}
+
+SCHEMA = f"""
 CREATE TABLE IF NOT EXISTS lists (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT NOT NULL,
     filename TEXT,
     row_count INTEGER DEFAULT 0,
     enrichment_status TEXT DEFAULT 'none',
+    import_status TEXT DEFAULT 'complete',
+    imported_rows INTEGER DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -40,7 +112,12 @@ CREATE TABLE IF NOT EXISTS leads (
     instagram TEXT,
     twitter_x TEXT,
     youtube TEXT,
-    tiktok TEXT
+    tiktok TEXT,
+    volume_amount INTEGER,
+    monthly_volume_amount INTEGER,
+    volume_export_amount INTEGER,
+    monthly_volume_export_amount INTEGER,
+    rank_num {GENERATED_COLUMNS["rank_num"]}
 );
 
 CREATE TABLE IF NOT EXISTS list_leads (
@@ -74,7 +151,7 @@ CREATE TABLE IF NOT EXISTS outreach_sessions (
     flyer_id INTEGER,
     template_id INTEGER,
     platform TEXT NOT NULL,
-    lead_queue TEXT DEFAULT '[]',
+    lead_count INTEGER DEFAULT 0,
     current_index INTEGER DEFAULT 0,
     status TEXT DEFAULT 'active',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -83,6 +160,15 @@ CREATE TABLE IF NOT EXISTS outreach_sessions (
     FOREIGN KEY (template_id) REFERENCES message_templates(id)
 );
 
+-- A session's leads in outreach order: the lead at any position is one
+-- primary-key lookup, however long the queue
+CREATE TABLE IF NOT EXISTS outreach_queue (
+    session_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    lead_id INTEGER NOT NULL,
+    PRIMARY KEY (session_id, position)
+) WITHOUT ROWID;
+
 CREATE TABLE IF NOT EXISTS outreach_logs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id INTEGER,
@@ -94,8 +180,142 @@ CREATE TABLE IF NOT EXISTS outreach_logs (
     FOREIGN KEY (session_id) REFERENCES outreach_sessions(id),
     FOREIGN KEY (lead_id) REFERENCES leads(id)
 );
+
+CREATE TABLE IF NOT EXISTS company_enrichment (
+    company_key TEXT PRIMARY KEY,
+    company TEXT,
+    website TEXT DEFAULT '',
+    email TEXT DEFAULT '',
+    facebook TEXT DEFAULT '',
+    linkedin TEXT DEFAULT '',
+    instagram TEXT DEFAULT '',
+    twitter_x TEXT DEFAULT '',
+    youtube TEXT DEFAULT '',
+    tiktok TEXT DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'ok',
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    list_id INTEGER,
+    params TEXT DEFAULT '{{}}',
+    status TEXT DEFAULT 'queued',
+    attempts INTEGER DEFAULT 0,
+    heartbeat_at REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+
+CREATE TABLE IF NOT EXISTS app_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    lead_id INTEGER NOT NULL,
+    PRIMARY KEY (job_id, stage, lead_id)
+) WITHOUT ROWID;
+"""
+
+# Created after the migrations in init_db(), since some of the indexed
+# columns are added by migration on older databases
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_leads_city ON leads(city, rank_num);
+CREATE INDEX IF NOT EXISTS idx_leads_lo_role ON leads(lo_role, rank_num);
+CREATE INDEX IF NOT EXISTS idx_leads_name ON leads(name);
+CREATE INDEX IF NOT EXISTS idx_leads_company ON leads(company);
+CREATE INDEX IF NOT EXISTS idx_leads_rank_num ON leads(rank_num);
+CREATE INDEX IF NOT EXISTS idx_leads_volume_export_amount ON leads(volume_export_amount);
+CREATE INDEX IF NOT EXISTS idx_outreach_logs_lead ON outreach_logs(lead_id, result, platform);
+"""
+
+# Full-text index over the searchable lead columns, kept in sync by triggers.
+# External content: the text lives only in leads, the index holds tokens.
+# prefix= adds prefix indexes so "fund*" lookups stay fast.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5(
+    name, company, city, company_website,
+    content='leads', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS leads_fts_insert AFTER INSERT ON leads BEGIN
+    INSERT INTO leads_fts (rowid, name, company, city, company_website)
+    VALUES (new.id, new.name, new.company, new.city, new.company_website);
+END;
+
+CREATE TRIGGER IF NOT EXISTS leads_fts_delete AFTER DELETE ON leads BEGIN
+    INSERT INTO leads_fts (leads_fts, rowid, name, company, city, company_website)
+    VALUES ('delete', old.id, old.name, old.company, old.city, old.company_website);
+END;
+
+CREATE TRIGGER IF NOT EXISTS leads_fts_update AFTER UPDATE OF name, company, city, company_website ON leads BEGIN
+    INSERT INTO leads_fts (leads_fts, rowid, name, company, city, company_website)
+    VALUES ('delete', old.id, old.name, old.company, old.city, old.company_website);
+    INSERT INTO leads_fts (rowid, name, company, city, company_website)
+    VALUES (new.id, new.name, new.company, new.city, new.company_website);
+END;
+"""
+
+# Per-lead, per-platform outreach totals, kept in step with outreach_logs by
+# triggers, so "has this lead been contacted" is a primary-key lookup rather
+# than a scan of the whole log history. A row exists while a lead has any
+# logged outcome on that platform; contacted means sent > 0.
+CONTACTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lead_contacts (
+    lead_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    sent INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (lead_id, platform)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS lead_contacts_insert AFTER INSERT ON outreach_logs BEGIN
+    INSERT INTO lead_contacts (lead_id, platform, sent, skipped)
+    VALUES (new.lead_id, IFNULL(new.platform, ''), new.result = 'sent', new.result = 'skipped')
+    ON CONFLICT (lead_id, platform) DO UPDATE SET
+        sent = sent + excluded.sent, skipped = skipped + excluded.skipped;
+END;
+
+CREATE TRIGGER IF NOT EXISTS lead_contacts_delete AFTER DELETE ON outreach_logs BEGIN
+    UPDATE lead_contacts SET sent = sent - (old.result = 'sent'), skipped = skipped - (old.result = 'skipped')
+    WHERE lead_id = old.lead_id AND platform = IFNULL(old.platform, '');
+    DELETE FROM lead_contacts
+    WHERE lead_id = old.lead_id AND platform = IFNULL(old.platform, '') AND sent <= 0 AND skipped <= 0;
+END;
+"""
+
+CONTACTS_BACKFILL = """
+INSERT OR REPLACE INTO lead_contacts (lead_id, platform, sent, skipped)
+SELECT lead_id, IFNULL(platform, ''), SUM(result = 'sent'), SUM(result = 'skipped')
+FROM outreach_logs
+WHERE result IN ('sent', 'skipped')
+GROUP BY lead_id, IFNULL(platform, '')
 """
 
+# bm25 column weights for ranking search results: a hit in the name counts
+# most, then company, website and city
+FTS_RANK = "bm25(10.0, 5.0, 1.0, 2.0)"
+
+
+def bump_stats_version(conn):
+    """Mark the cached dashboard stats stale (see routes.dashboard).
+
+    Call from any write that changes what the dashboard counts: imports,
+    enrichment and outreach. Runs in the caller's transaction, so the stats
+    are recomputed once the write is visible.
+    """
+    conn.execute("UPDATE app_meta SET value = value + 1 WHERE key = 'stats_version'")
+
+
+def stats_version(conn):
+    return conn.execute("SELECT value FROM app_meta WHERE key = 'stats_version'").fetchone()[0]
+
 
 def get_db():
     if "db" not in g:
@@ -117,10 +337,73 @@ def init_db():
     os.makedirs(os.path.dirname(config.DATABASE), exist_ok=True)
     conn = sqlite3.connect(config.DATABASE)
     conn.executescript(SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('stats_version', 0)")
     # Migrate: add template_id to outreach_sessions if missing
     cols = [row[1] for row in conn.execute("PRAGMA table_info(outreach_sessions)").fetchall()]
     if "template_id" not in cols:
         conn.execute("ALTER TABLE outreach_sessions ADD COLUMN template_id INTEGER REFERENCES message_templates(id)")
+    # Migrate: move session queues from the lead_queue JSON array to outreach_queue
+    if "lead_queue" in cols:
+        conn.execute("ALTER TABLE outreach_sessions ADD COLUMN lead_count INTEGER DEFAULT 0")
+        conn.execute(
+            """INSERT OR IGNORE INTO outreach_queue (session_id, position, lead_id)
+               SELECT s.id, q.key, q.value FROM outreach_sessions s, json_each(s.lead_queue) q"""
+        )
+        conn.execute("UPDATE outreach_sessions SET lead_count = json_array_length(lead_queue)")
+        conn.execute("ALTER TABLE outreach_sessions DROP COLUMN lead_queue")
+    # Migrate: add background import progress to lists if missing
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(lists)").fetchall()]
+    if "import_status" not in cols:
+        conn.execute("ALTER TABLE lists ADD COLUMN import_status TEXT DEFAULT 'complete'")
+        conn.execute("ALTER TABLE lists ADD COLUMN imported_rows INTEGER DEFAULT 0")
+    # Migrate: add a status to stored company results. Older rows cannot
+    # tell failures apart, so they keep the found / nothing found split.
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(company_enrichment)").fetchall()]
+    if "status" not in cols:
+        conn.execute("ALTER TABLE company_enrichment ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'")
+        conn.execute(
+            """UPDATE company_enrichment SET status = 'empty'
+               WHERE IFNULL(website, '') || IFNULL(email, '') || IFNULL(facebook, '') || IFNULL(linkedin, '')
+                     || IFNULL(instagram, '') || IFNULL(twitter_x, '') || IFNULL(youtube, '') || IFNULL(tiktok, '') = ''"""
+        )
+    # Migrate: add typed rank column to leads if missing
+    cols = {row[1]: row[6] for row in conn.execute("PRAGMA table_xinfo(leads)").fetchall()}  # name -> hidden
+    for col, definition in GENERATED_COLUMNS.items():
+        if col not in cols:
+            conn.execute(f"ALTER TABLE leads ADD COLUMN {col} {definition}")
+    # Migrate: store volume amounts and integer units, parsed from the text
+    # columns. volume_export_amount used to be a generated column.
+    if cols.get("volume_export_amount") in (2, 3):
+        conn.execute("DROP INDEX IF EXISTS idx_leads_volume_export_amount")
+        conn.execute("ALTER TABLE leads DROP COLUMN volume_export_amount")
+        del cols["volume_export_amount"]
+    if "volume_amount" not in cols:
+        for text_col, amount_col in VOLUME_AMOUNTS.items():
+            if amount_col not in cols:
+                conn.execute(f"ALTER TABLE leads ADD COLUMN {amount_col} INTEGER")
+        conn.execute(
+            f"UPDATE leads SET {', '.join(f'{a} = {amount_sql(t)}' for t, a in VOLUME_AMOUNTS.items())}"
+        )
+        for col in ("units", "monthly_units"):
+            conn.execute(
+                f"""UPDATE leads SET {col} = CAST(NULLIF(REPLACE(TRIM({col}), ',', ''), '') AS INTEGER)
+                    WHERE typeof({col}) = 'text'"""
+            )
+    conn.executescript(INDEXES)
+    # Migrate: build the full-text index over existing leads
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'leads_fts'").fetchone():
+        conn.executescript(FTS_SCHEMA)
+        conn.execute("INSERT INTO leads_fts (leads_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO leads_fts (leads_fts, rank) VALUES ('rank', ?)", (FTS_RANK,))
+    # Migrate: derive contact state from the existing outreach history
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'lead_contacts'").fetchone():
+        conn.executescript(CONTACTS_SCHEMA)
+        conn.execute(CONTACTS_BACKFILL)
+    # Planner statistics: gather once, then let SQLite refresh them as needed
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("PRAGMA optimize")
+    else:
+        conn.execute("ANALYZE")
     conn.commit()
     conn.close()
 
@@ -1,6 +1,5 @@
-import json
 from flask import Blueprint, request, jsonify
-from models import get_db, query_db
+from models import bump_stats_version, format_money, get_db, query_db
 
 bp = Blueprint("api", __name__)
 
@@ -24,17 +23,17 @@ def log_action():
 
     db = get_db()
 
-    # Log the action
+    # Log the action (the lead_contacts_insert trigger counts it against the lead)
     db.execute(
         "INSERT INTO outreach_logs (session_id, lead_id, platform, flyer_id, result) VALUES (?, ?, ?, ?, ?)",
         (session_id, lead_id, sess["platform"], sess["flyer_id"], result),
     )
+    bump_stats_version(db)
 
     # Advance session index
-    lead_queue = json.loads(sess["lead_queue"])
     new_index = sess["current_index"] + 1
 
-    if new_index >= len(lead_queue):
+    if new_index >= sess["lead_count"]:
         db.execute(
             "UPDATE outreach_sessions SET current_index = ?, status = 'complete' WHERE id = ?",
             (new_index, session_id),
@@ -48,11 +47,15 @@ def log_action():
     db.commit()
 
     # Return next lead data or done signal
-    if new_index >= len(lead_queue):
+    if new_index >= sess["lead_count"]:
         return jsonify({"done": True, "session_id": session_id})
 
-    next_lead_id = lead_queue[new_index]
-    lead = query_db("SELECT * FROM leads WHERE id = ?", (next_lead_id,), one=True)
+    lead = query_db(
+        """SELECT l.* FROM outreach_queue q JOIN leads l ON l.id = q.lead_id
+           WHERE q.session_id = ? AND q.position = ?""",
+        (session_id, new_index),
+        one=True,
+    )
 
     platform = sess["platform"]
     platform_col_map = {
@@ -70,12 +73,12 @@ def log_action():
             "name": lead["name"],
             "company": lead["company"],
             "city": lead["city"],
-            "volume": lead["volume"],
+            "volume": format_money(lead["volume_amount"]) or lead["volume"] or "",
             "rank": lead["rank"],
             "profile_url": profile_url,
         },
         "current": new_index + 1,
-        "total": len(lead_queue),
+        "total": sess["lead_count"],
     })
 
 
@@ -95,13 +98,17 @@ def go_back():
     if current_index <= 0:
         return jsonify({"error": "Already at the first lead"}), 400
 
-    lead_queue = json.loads(sess["lead_queue"])
     prev_index = current_index - 1
-    prev_lead_id = lead_queue[prev_index]
+    prev_lead_id = query_db(
+        "SELECT lead_id FROM outreach_queue WHERE session_id = ? AND position = ?",
+        (session_id, prev_index),
+        one=True,
+    )["lead_id"]
 
     db = get_db()
 
-    # Delete the most recent log for this lead in this session
+    # Delete the most recent log for this lead in this session (the
+    # lead_contacts_delete trigger takes it back off the lead's contact state)
     db.execute(
         """DELETE FROM outreach_logs WHERE id = (
             SELECT id FROM outreach_logs
@@ -110,6 +117,7 @@ def go_back():
         )""",
         (session_id, prev_lead_id),
     )
+    bump_stats_version(db)
 
     # Move index back
     db.execute(
@@ -135,12 +143,12 @@ def go_back():
             "name": lead["name"],
             "company": lead["company"],
             "city": lead["city"],
-            "volume": lead["volume"],
+            "volume": format_money(lead["volume_amount"]) or lead["volume"] or "",
             "rank": lead["rank"],
             "profile_url": profile_url,
         },
         "current": prev_index + 1,
-        "total": len(lead_queue),
+        "total": sess["lead_count"],
     })
 
 
@@ -151,6 +159,19 @@ def list_status(list_id):
         return jsonify({"error": "Not found"}), 404
 
     total = lst["row_count"]
+
+    # Background import still running: report rows imported so far
+    if lst["import_status"] != "complete":
+        imported = lst["imported_rows"] or 0
+        return jsonify({
+            "status": "importing" if lst["import_status"] == "importing" else "import_error",
+            "import_status": lst["import_status"],
+            "total": total,
+            "imported": imported,
+            "enriched": 0,
+            "progress_pct": min(int(imported / total * 100), 100) if total > 0 else 0,
+        })
+
     enriched = 0
     if lst["enrichment_status"] not in ("none", "pending"):
         leads = query_db(
@@ -165,6 +186,7 @@ def list_status(list_id):
 
     return jsonify({
         "status": lst["enrichment_status"],
+        "import_status": lst["import_status"],
         "total": total,
         "enriched": enriched,
         "progress_pct": int(enriched / total * 100) if total > 0 else 0,
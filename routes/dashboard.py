@@ -1,63 +1,145 @@
-import csv
-import io
-from flask import Blueprint, render_template, Response
-from models import query_db, get_db
+from flask import Blueprint, abort, render_template, request, Response
+from exporter import (
+    DATASETS, FORMATS, csv_chunks, dataset_sql, fetch_chunks, gzip_chunks, ndjson_chunks,
+    parquet_available, parquet_chunks, table_columns,
+)
+from models import get_db, query_db, stats_version
+from routes.leads import SORT_ORDERS, lead_filters, pick_sort
 
 bp = Blueprint("dashboard", __name__)
 
 
+PLATFORMS = ["facebook", "linkedin", "instagram", "twitter_x", "youtube", "tiktok"]
+
+
+def _filled(col):
+    return f"SUM({col} != '' AND {col} IS NOT NULL)"
+
+
+# Every dashboard total in one statement: a single pass over leads, plus
+# the outreach totals from lead_contacts and the session count
+STATS_SQL = f"""
+SELECT COUNT(*) AS total_leads,
+       IFNULL({_filled("email")}, 0) AS leads_with_email,
+       IFNULL({_filled("company_website")}, 0) AS leads_with_website,
+       {", ".join(f'IFNULL({_filled(p)}, 0) AS {p}' for p in PLATFORMS)},
+       (SELECT IFNULL(SUM(sent), 0) FROM lead_contacts) AS total_sent,
+       (SELECT IFNULL(SUM(skipped), 0) FROM lead_contacts) AS total_skipped,
+       (SELECT COUNT(*) FROM outreach_sessions) AS total_sessions
+FROM leads
+"""
+
+_stats = (None, None)  # (stats_version, stats)
+
+
+def dashboard_stats():
+    """The dashboard totals, recomputed only after a write bumps stats_version.
+
+    Checking the version is a single-row read, so a dashboard view costs the
+    same however many leads and logs there are, except for the first view
+    after an import, enrichment or outreach write.
+    """
+    global _stats
+    version = stats_version(get_db())
+    cached_version, stats = _stats
+    if version != cached_version:
+        stats = dict(query_db(STATS_SQL, one=True))
+        _stats = (version, stats)
+    return stats
+
+
 @bp.route("/")
 @bp.route("/dashboard")
 def index():
-    total_leads = query_db("SELECT COUNT(*) as c FROM leads", one=True)["c"]
-    leads_with_email = query_db("SELECT COUNT(*) as c FROM leads WHERE email != '' AND email IS NOT NULL", one=True)["c"]
-    leads_with_website = query_db("SELECT COUNT(*) as c FROM leads WHERE company_website != '' AND company_website IS NOT NULL", one=True)["c"]
-
-    platform_counts = {}
-    for platform in ["facebook", "linkedin", "instagram", "twitter_x", "youtube", "tiktok"]:
-        count = query_db(
-            f"SELECT COUNT(*) as c FROM leads WHERE {platform} != '' AND {platform} IS NOT NULL",
-            one=True,
-        )["c"]
-        platform_counts[platform] = count
-
+    stats = dashboard_stats()
     lists = query_db("SELECT * FROM lists ORDER BY created_at DESC")
     recent_logs = query_db(
         """SELECT ol.*, l.name as lead_name, l.company
            FROM outreach_logs ol
            JOIN leads l ON ol.lead_id = l.id
-           ORDER BY ol.timestamp DESC LIMIT 10"""
+           ORDER BY ol.id DESC LIMIT 10"""
     )
-    total_sessions = query_db("SELECT COUNT(*) as c FROM outreach_sessions", one=True)["c"]
-    total_sent = query_db("SELECT COUNT(*) as c FROM outreach_logs WHERE result = 'sent'", one=True)["c"]
-    total_skipped = query_db("SELECT COUNT(*) as c FROM outreach_logs WHERE result = 'skipped'", one=True)["c"]
 
     return render_template(
         "dashboard.html",
-        total_leads=total_leads,
-        leads_with_email=leads_with_email,
-        leads_with_website=leads_with_website,
-        platform_counts=platform_counts,
+        total_leads=stats["total_leads"],
+        leads_with_email=stats["leads_with_email"],
+        leads_with_website=stats["leads_with_website"],
+        platform_counts={platform: stats[platform] for platform in PLATFORMS},
         lists=lists,
         recent_logs=recent_logs,
-        total_sessions=total_sessions,
-        total_sent=total_sent,
-        total_skipped=total_skipped,
+        total_sessions=stats["total_sessions"],
+        total_sent=stats["total_sent"],
+        total_skipped=stats["total_skipped"],
     )
 
 
+def _wants_gzip(args):
+    """True for ?gzip=1, true or yes; ?gzip=0 or false leave the export plain."""
+    return args.get("gzip", "").lower() in ("1", "true", "yes")
+
+
 @bp.route("/dashboard/export")
 def export_csv():
-    leads = query_db("SELECT * FROM leads ORDER BY rank")
+    """Stream leads as CSV, filtered like /leads (all leads by default).
+
+    Takes the /leads filter and sort arguments; ?gzip=1 compresses the
+    download.
+    """
+    args = request.args.copy()
+    args.setdefault("show_archived", "all")
+    from_sql, where_sql, params = lead_filters(args)
+    sort = pick_sort(args.get("sort", "relevance"), from_sql)
+    columns = ", ".join(f"leads.{col}" for col in table_columns(get_db(), "leads"))
+
+    chunks = csv_chunks(fetch_chunks(
+        f"SELECT {columns} FROM {from_sql} WHERE {where_sql} ORDER BY {SORT_ORDERS[sort]}", params
+    ))
+    filename, mimetype = "leads_export.csv", "text/csv"
+    if _wants_gzip(args):
+        chunks = gzip_chunks(chunks)
+        filename, mimetype = filename + ".gz", "application/gzip"
+
+    response = Response(chunks, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
+
+
+@bp.route("/dashboard/export/<dataset>")
+def export_data(dataset):
+    """Stream a typed dataset (leads, outreach_logs, sessions) for analytics.
+
+    ?format=ndjson (default), csv or parquet (needs pyarrow); ?gzip=1
+    compresses csv and ndjson. Leads take the /leads filters, like
+    /dashboard/export.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if dataset not in DATASETS or fmt not in FORMATS:
+        abort(404)
+    if fmt == "parquet" and not parquet_available():
+        return Response("Parquet export needs pyarrow installed.\n", status=501, mimetype="text/plain")
 
-    output = io.StringIO()
-    writer = csv.writer(output)
+    if dataset == "leads":
+        args = request.args.copy()
+        args.setdefault("show_archived", "all")
+        from_sql, where_sql, params = lead_filters(args)
+        sort = pick_sort(args.get("sort", "relevance"), from_sql)
+        sql = dataset_sql(dataset, from_sql, where_sql, SORT_ORDERS[sort], as_json=fmt == "ndjson")
+    else:
+        sql, params = dataset_sql(dataset, as_json=fmt == "ndjson"), []
+    chunks = fetch_chunks(sql, params)
 
-    if leads:
-        writer.writerow(leads[0].keys())
-        for lead in leads:
-            writer.writerow(list(lead))
+    filename = dataset + FORMATS[fmt]
+    if fmt == "parquet":
+        chunks, mimetype = parquet_chunks(chunks, dataset), "application/vnd.apache.parquet"
+    elif fmt == "csv":
+        chunks, mimetype = csv_chunks(chunks), "text/csv"
+    else:
+        chunks, mimetype = ndjson_chunks(chunks), "application/x-ndjson"
+    if fmt != "parquet" and _wants_gzip(request.args):
+        chunks = gzip_chunks(chunks)
+        filename, mimetype = filename + ".gz", "application/gzip"
 
-    response = Response(output.getvalue(), mimetype="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=leads_export.csv"
+    response = Response(chunks, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
     return response
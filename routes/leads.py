@@ -1,29 +1,159 @@
+import base64
+import json
+import re
 import time
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import get_db, query_db
+import config
+from models import SQLITE_INT_MAX, SQLITE_INT_MIN, bump_stats_version, get_db, parse_amount, query_db
 
 bp = Blueprint("leads", __name__)
 
 PER_PAGE = 25
 
 
-@bp.route("/leads")
-def index():
-    page = request.args.get("page", 1, type=int)
-    search = request.args.get("search", "").strip()
-    platform = request.args.get("platform", "")
-    role = request.args.get("role", "")
-    city = request.args.get("city", "")
-    sort = request.args.get("sort", "rank")
-    list_id = request.args.get("list_id", "", type=str)
-    show_archived = request.args.get("show_archived", "")
+# Sort key for each option: (column, descending). Rank and volume sort on
+# the typed, indexed columns (models.GENERATED_COLUMNS, VOLUME_AMOUNTS). "relevance" is
+# the bm25 rank of a search (see models.FTS_RANK) and falls back to rank
+# without one. Ties are broken by id, in the direction the column's index
+# already stores them, so (column, id) pins a row's position: pages are
+# stable and can be fetched by keyset instead of OFFSET.
+SORT_KEYS = {
+    "relevance": ("leads_fts.rank", False),
+    "rank": ("leads.rank_num", False),
+    "name": ("leads.name", False),
+    "volume": ("leads.volume_export_amount", True),
+    "company": ("leads.company", False),
+}
+
+
+def order_sql(sort, reverse=False):
+    """ORDER BY clause for a sort option, optionally walking it backwards."""
+    col, desc = SORT_KEYS[sort]
+    direction = "DESC" if desc != reverse else "ASC"
+    return f"{col} {direction}, leads.id {direction}"
+
+
+SORT_ORDERS = {sort: order_sql(sort) for sort in SORT_KEYS}
+
+
+def encode_cursor(value, lead_id):
+    """Opaque page cursor for a row's sort key."""
+    return base64.urlsafe_b64encode(json.dumps([value, lead_id]).encode()).decode()
+
+
+def _sql_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and SQLITE_INT_MIN <= value <= SQLITE_INT_MAX
+
+
+def decode_cursor(cursor):
+    """(value, lead_id) from encode_cursor(), or None if it is malformed."""
+    try:
+        value, lead_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not _sql_int(lead_id):
+        return None
+    if not (value is None or isinstance(value, (str, float)) or _sql_int(value)):
+        return None
+    return value, lead_id
+
+
+def keyset_ranges(sort, cursor, reverse=False):
+    """WHERE clauses and params selecting the rows after cursor in sort order.
+
+    With reverse, the rows before it instead. SQLite sorts NULLs first, so
+    they come before every value going up and after every value going down.
+    Each clause is one range of the sort column's index (an OR would make
+    SQLite scan it from the start), and together they cover the rest of the
+    listing in order: read them in turn until the page is full.
+    """
+    col, desc = SORT_KEYS[sort]
+    value, lead_id = cursor
+    if desc == reverse:  # walking up
+        if value is None:
+            return [(f"{col} IS NULL AND leads.id > ?", [lead_id]), (f"{col} IS NOT NULL", [])]
+        return [(f"({col}, leads.id) > (?, ?)", [value, lead_id])]
+    if value is None:  # walking down
+        return [(f"{col} IS NULL AND leads.id < ?", [lead_id])]
+    return [(f"({col}, leads.id) < (?, ?)", [value, lead_id]), (f"{col} IS NULL", [])]
+
+
+def fetch_page(from_sql, where_sql, params, sort, cursor=None, reverse=False, offset=0, limit=PER_PAGE):
+    """Up to limit leads in sort order, from cursor (or offset), with their sort_value."""
+    col = SORT_KEYS[sort][0]
+    ranges = keyset_ranges(sort, cursor, reverse) if cursor else [("1=1", [])]
+    rows = []
+    for range_sql, range_params in ranges:
+        rows += query_db(
+            f"""SELECT leads.*, {col} AS sort_value FROM {from_sql} WHERE {where_sql} AND {range_sql}
+                ORDER BY {order_sql(sort, reverse)} LIMIT ? OFFSET ?""",
+            params + range_params + [limit - len(rows), offset],
+        )
+        if len(rows) == limit:
+            break
+    return rows
+
+
+_counts = {}  # (sql, params) -> (expires_at, count)
 
+
+def cached_count(sql, params=()):
+    """Run a COUNT query, reusing its result for config.COUNT_CACHE_TTL seconds.
+
+    The lead browser's totals can then lag recent writes by that much, in
+    exchange for not re-counting the whole filtered set on every page.
+    """
+    key = (sql, tuple(params))
+    now = time.monotonic()
+    hit = _counts.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    count = query_db(sql, params, one=True)[0]
+    if len(_counts) >= 1000:
+        _counts.clear()
+    _counts[key] = (now + config.COUNT_CACHE_TTL, count)
+    return count
+
+
+def pick_sort(sort, from_sql):
+    """The SORT_KEYS entry for a requested sort option and FROM clause."""
+    if sort not in SORT_KEYS or (sort == "relevance" and from_sql == "leads"):
+        return "rank"  # nothing searched, nothing to rank by
+    return sort
+
+
+def fts_query(search):
+    """Turn free text into an FTS5 query: every word, as a prefix, must match.
+
+    Words are quoted, so FTS5 syntax in the input is matched literally.
+    Returns "" if the text has no words.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search.lower()))
+
+
+def lead_filters(args):
+    """Build the FROM and WHERE clauses and params for the /leads filter arguments.
+
+    A search joins leads_fts, so callers can order by its rank.
+    """
+    search = args.get("search", "").strip()
+    platform = args.get("platform", "")
+    role = args.get("role", "")
+    city = args.get("city", "")
+    list_id = args.get("list_id", "", type=str)
+    show_archived = args.get("show_archived", "")
+    volume_min = parse_amount(args.get("volume_min", ""))
+    volume_max = parse_amount(args.get("volume_max", ""))
+
+    from_sql = "leads"
     where_clauses = []
     params = []
 
-    if search:
-        where_clauses.append("(leads.name LIKE ? OR leads.company LIKE ?)")
-        params.extend([f"%{search}%", f"%{search}%"])
+    match = fts_query(search)
+    if match:
+        from_sql = "leads JOIN leads_fts ON leads_fts.rowid = leads.id"
+        where_clauses.append("leads_fts MATCH ?")
+        params.append(match)
 
     if platform:
         col = platform if platform != "twitter_x" else "twitter_x"
@@ -44,34 +174,71 @@ def index():
         where_clauses.append("leads.id IN (SELECT lead_id FROM list_leads WHERE list_id = ?)")
         params.append(int(list_id))
 
-    # Archive filter
+    # Volume range ("5M", "$500K", "2500000"), on the indexed amount
+    if volume_min is not None:
+        where_clauses.append("leads.volume_export_amount >= ?")
+        params.append(volume_min)
+    if volume_max is not None:
+        where_clauses.append("leads.volume_export_amount <= ?")
+        params.append(volume_max)
+
+    # Archive filter, on the contact state kept in lead_contacts. Contacted
+    # leads are few, so "only" is driven from that table; excluding them is a
+    # primary-key probe per lead, which lets a sorted page stop as soon as it
+    # has its rows.
     if show_archived == "only":
-        where_clauses.append("leads.id IN (SELECT DISTINCT lead_id FROM outreach_logs WHERE result = 'sent')")
+        where_clauses.append("leads.id IN (SELECT lead_id FROM lead_contacts WHERE sent > 0)")
     elif show_archived == "all":
         pass  # no filter
     else:
         # Default: exclude contacted leads
-        where_clauses.append("leads.id NOT IN (SELECT DISTINCT lead_id FROM outreach_logs WHERE result = 'sent')")
+        where_clauses.append(
+            "NOT EXISTS (SELECT 1 FROM lead_contacts lc WHERE lc.lead_id = leads.id AND lc.sent > 0)"
+        )
 
     where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    return from_sql, where_sql, params
 
-    sort_map = {
-        "rank": "CAST(leads.rank AS INTEGER)",
-        "name": "leads.name",
-        "volume": "CAST(REPLACE(REPLACE(leads.volume_export, ',', ''), '$', '') AS INTEGER) DESC",
-        "company": "leads.company",
-    }
-    order_sql = sort_map.get(sort, "CAST(leads.rank AS INTEGER)")
 
-    total = query_db(f"SELECT COUNT(*) as c FROM leads WHERE {where_sql}", params, one=True)["c"]
+@bp.route("/leads")
+def index():
+    page = request.args.get("page", 1, type=int)
+    search = request.args.get("search", "").strip()
+    platform = request.args.get("platform", "")
+    role = request.args.get("role", "")
+    city = request.args.get("city", "")
+    sort = request.args.get("sort", "relevance")
+    list_id = request.args.get("list_id", "", type=str)
+    show_archived = request.args.get("show_archived", "")
+    volume_min = request.args.get("volume_min", "").strip()
+    volume_max = request.args.get("volume_max", "").strip()
+
+    from_sql, where_sql, params = lead_filters(request.args)
+    sort_key = pick_sort(sort, from_sql)
+
+    total = cached_count(f"SELECT COUNT(*) FROM {from_sql} WHERE {where_sql}", params)
     total_pages = max(1, (total + PER_PAGE - 1) // PER_PAGE)
     page = max(1, min(page, total_pages))
-    offset = (page - 1) * PER_PAGE
 
-    leads = query_db(
-        f"SELECT * FROM leads WHERE {where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
-        params + [PER_PAGE, offset],
-    )
+    # Keyset pagination: Next/Previous carry the sort key of the last/first
+    # row shown, so any page costs the same as the first. A bare ?page=N
+    # (no cursor) still works, by OFFSET.
+    after = decode_cursor(request.args.get("after", ""))
+    before = decode_cursor(request.args.get("before", ""))
+    offset = 0 if after or before else (page - 1) * PER_PAGE
+    rows = fetch_page(from_sql, where_sql, params, sort_key, before or after,
+                      reverse=bool(before), offset=offset, limit=PER_PAGE + 1)
+    more = len(rows) > PER_PAGE  # another page beyond these, in the direction walked
+    leads = rows[:PER_PAGE]
+    if before:
+        leads.reverse()
+
+    prev_cursor = next_cursor = ""
+    if leads:
+        if page > 1 and (more or not before):
+            prev_cursor = encode_cursor(leads[0]["sort_value"], leads[0]["id"])
+        if more or before:
+            next_cursor = encode_cursor(leads[-1]["sort_value"], leads[-1]["id"])
 
     # Get distinct cities for filter dropdown
     cities = query_db("SELECT DISTINCT city FROM leads WHERE city != '' ORDER BY city")
@@ -80,10 +247,7 @@ def index():
     lists = query_db("SELECT id, name FROM lists ORDER BY name")
 
     # Count contacted leads (for tab badge)
-    archived_count = query_db(
-        "SELECT COUNT(DISTINCT lead_id) as c FROM outreach_logs WHERE result = 'sent'",
-        one=True,
-    )["c"]
+    archived_count = query_db("SELECT COUNT(DISTINCT lead_id) FROM lead_contacts WHERE sent > 0", one=True)[0]
 
     return render_template(
         "leads/index.html",
@@ -91,6 +255,8 @@ def index():
         page=page,
         total_pages=total_pages,
         total=total,
+        prev_cursor=prev_cursor,
+        next_cursor=next_cursor,
         search=search,
         platform=platform,
         role=role,
@@ -100,6 +266,8 @@ def index():
         lists=lists,
         list_id=list_id,
         show_archived=show_archived,
+        volume_min=volume_min,
+        volume_max=volume_max,
         archived_count=archived_count,
     )
 
@@ -141,6 +309,7 @@ def add_lead():
             (1, lead_id),
         )
 
+    bump_stats_version(db)
     db.commit()
     flash(f"Lead '{name}' added successfully.", "success")
     return redirect(url_for("leads.index"))
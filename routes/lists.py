@@ -1,71 +1,14 @@
-import csv
 import os
 import uuid
-import threading
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 import config
+import jobs
 from models import get_db, query_db
+from importer import UploadReader, map_columns, pick_column_map
 
 bp = Blueprint("lists", __name__)
 
 
-def _parse_upload(filepath):
-    """Parse a CSV or XLSX file, returning (header, rows) as lists of strings."""
-    ext = os.path.splitext(filepath)[1].lower()
-
-    if ext == ".xlsx":
-        from openpyxl import load_workbook
-
-        def _cell_to_str(val):
-            if val is None:
-                return ""
-            if isinstance(val, float) and val == int(val):
-                return str(int(val))
-            return str(val)
-
-        wb = load_workbook(filepath, read_only=True, data_only=True)
-        ws = wb.active
-        rows_iter = ws.iter_rows()
-        header = [_cell_to_str(cell.value) for cell in next(rows_iter)]
-        rows = []
-        for row in rows_iter:
-            rows.append([_cell_to_str(cell.value) for cell in row])
-        wb.close()
-        return header, rows
-    else:
-        with open(filepath, "r", encoding="utf-8-sig") as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            rows = list(reader)
-        return header, rows
-
-
-def _format_volume(val):
-    """Format raw volume number to $X.XM display format."""
-    if not val or val == "None":
-        return ""
-    try:
-        num = float(val.replace(",", "").replace("$", ""))
-        if num >= 1_000_000:
-            return f"${num / 1_000_000:.1f}M"
-        elif num >= 1_000:
-            return f"${num / 1_000:.0f}K"
-        else:
-            return f"${num:,.0f}"
-    except (ValueError, AttributeError):
-        return val
-
-
-def _pick_column_map(header):
-    """Auto-detect which column map has more header matches."""
-    from import_csv import COLUMN_MAP, XLSX_COLUMN_MAP
-
-    csv_hits = sum(1 for col in COLUMN_MAP if col in header)
-    xlsx_hits = sum(1 for col in XLSX_COLUMN_MAP if col in header)
-
-    return XLSX_COLUMN_MAP if xlsx_hits > csv_hits else COLUMN_MAP
-
-
 @bp.route("/lists")
 def index():
     lists = query_db("SELECT * FROM lists ORDER BY created_at DESC")
@@ -96,9 +39,12 @@ def upload():
     filepath = os.path.join(config.UPLOAD_FOLDER_CSV, stored_name)
     file.save(filepath)
 
-    # Parse file (CSV or XLSX)
+    # Read the header and estimate the row count now; rows are streamed
+    # by the background import
     try:
-        header, rows = _parse_upload(filepath)
+        with UploadReader(filepath) as reader:
+            header = reader.header
+            total_rows = reader.total_rows
     except Exception as e:
         flash(f"Error reading file: {e}", "error")
         return redirect(url_for("lists.index"))
@@ -106,100 +52,37 @@ def upload():
     db = get_db()
 
     # Auto-detect column map
-    active_map = _pick_column_map(header)
+    active_map = pick_column_map(header)
 
     # Determine enrichment status from headers
     has_website = "Company Website" in header
     has_socials = "Facebook" in header
     enrichment_status = "complete" if (has_website and has_socials) else "none"
 
-    # Create list record
+    # Create list record; row_count is an estimate until the import finishes
     cur = db.execute(
-        "INSERT INTO lists (name, filename, row_count, enrichment_status) VALUES (?, ?, ?, ?)",
-        (list_name, stored_name, len(rows), enrichment_status),
+        """INSERT INTO lists (name, filename, row_count, enrichment_status, import_status)
+           VALUES (?, ?, ?, ?, 'importing')""",
+        (list_name, stored_name, total_rows, enrichment_status),
     )
     list_id = cur.lastrowid
 
     # Build column index mapping
-    col_indices = {}
-    for csv_col, db_col in active_map.items():
-        if csv_col in header:
-            col_indices[header.index(csv_col)] = db_col
+    col_indices = map_columns(header, active_map)
 
-    if not col_indices:
+    if not col_indices or "nmlsid" not in col_indices.values():
+        db.execute("UPDATE lists SET row_count = 0, import_status = 'complete' WHERE id = ?", (list_id,))
         db.commit()
-        flash(f"Warning: No matching columns found. Created list with 0 leads.", "error")
-        return redirect(url_for("lists.detail", list_id=list_id))
-
-    # Find which column maps to nmlsid
-    nmlsid_idx = None
-    for idx, db_col in col_indices.items():
-        if db_col == "nmlsid":
-            nmlsid_idx = idx
-            break
-
-    if nmlsid_idx is None:
-        db.commit()
-        flash("Error: No NMLSID column found in file", "error")
+        if not col_indices:
+            flash(f"Warning: No matching columns found. Created list with 0 leads.", "error")
+        else:
+            flash("Error: No NMLSID column found in file", "error")
         return redirect(url_for("lists.detail", list_id=list_id))
 
-    sorted_indices = sorted(col_indices.keys())
-    db_columns = [col_indices[idx] for idx in sorted_indices]
-    placeholders = ", ".join(["?"] * len(db_columns))
-    col_names = ", ".join(db_columns)
-    update_cols = [c for c in db_columns if c != "nmlsid"]
-    update_set = ", ".join(f"{c} = excluded.{c}" for c in update_cols)
-
-    insert_sql = f"""
-        INSERT INTO leads ({col_names})
-        VALUES ({placeholders})
-        ON CONFLICT(nmlsid) DO UPDATE SET {update_set}
-    """
-
-    lead_ids = []
-
-    for row in rows:
-        # Skip rows with blank/missing nmlsid
-        nmlsid_val = row[nmlsid_idx] if nmlsid_idx < len(row) else ""
-        if not nmlsid_val or nmlsid_val.strip() == "" or nmlsid_val == "None":
-            continue
-
-        values = []
-        for idx in sorted_indices:
-            val = row[idx] if idx < len(row) else ""
-            # Clean "None" string values from XLSX
-            if val == "None":
-                val = ""
-            # Format volume columns for display
-            db_col = col_indices[idx]
-            if db_col in ("volume", "volume_export") and val:
-                val = _format_volume(val)
-            values.append(val)
-
-        try:
-            db.execute(insert_sql, values)
-            lead_row = db.execute("SELECT id FROM leads WHERE nmlsid = ?", (nmlsid_val.strip(),)).fetchone()
-            if lead_row:
-                lead_ids.append(lead_row["id"])
-        except Exception as e:
-            print(f"  Error importing row: {e}")
-
-    # Update row_count with actual leads linked
-    db.execute("UPDATE lists SET row_count = ? WHERE id = ?", (len(lead_ids), list_id))
-
-    for lead_id in lead_ids:
-        db.execute("INSERT OR IGNORE INTO list_leads (list_id, lead_id) VALUES (?, ?)", (list_id, lead_id))
-
-    # For company-level imports (XLSX): copy company name to name field if not mapped
-    if "company" in db_columns and "name" not in db_columns:
-        for lead_id in lead_ids:
-            db.execute(
-                "UPDATE leads SET name = company WHERE id = ? AND (name IS NULL OR name = '')",
-                (lead_id,),
-            )
+    # Queue the import as a background job
+    jobs.enqueue(db, "import", list_id, {"filepath": filepath})
 
-    db.commit()
-    flash(f"Imported {len(lead_ids)} leads into '{list_name}'", "success")
+    flash(f"Importing {total_rows} rows into '{list_name}'. Progress will update automatically.", "info")
     return redirect(url_for("lists.detail", list_id=list_id))
 
 
@@ -214,7 +97,7 @@ def detail(list_id):
         """SELECT l.* FROM leads l
            JOIN list_leads ll ON l.id = ll.lead_id
            WHERE ll.list_id = ?
-           ORDER BY CAST(l.rank AS INTEGER)""",
+           ORDER BY l.rank_num""",
         (list_id,),
     )
 
@@ -229,6 +112,7 @@ def delete(list_id):
         return redirect(url_for("lists.index"))
 
     db = get_db()
+    db.execute("DELETE FROM jobs WHERE list_id = ? AND status = 'queued'", (list_id,))
     db.execute("DELETE FROM list_leads WHERE list_id = ?", (list_id,))
     db.execute("DELETE FROM lists WHERE id = ?", (list_id,))
     db.commit()
@@ -244,25 +128,21 @@ def enrich(list_id):
         flash("List not found", "error")
         return redirect(url_for("lists.index"))
 
+    if lst["import_status"] == "importing":
+        flash("Wait for the import to finish before enriching", "info")
+        return redirect(url_for("lists.detail", list_id=list_id))
+
     # Allow enrichment for 'none', 'error', and 'complete' (re-enrich)
     if lst["enrichment_status"] not in ("none", "error", "complete"):
         flash("Enrichment is already in progress", "info")
         return redirect(url_for("lists.detail", list_id=list_id))
 
-    db = get_db()
-    db.execute("UPDATE lists SET enrichment_status = 'enriching_urls' WHERE id = ?", (list_id,))
-    db.commit()
-
-    # Run enrichment in background thread
-    app = current_app._get_current_object()
+    # Revalidate: refresh only stale or failed cache entries
+    revalidate = request.form.get("revalidate") == "1"
 
-    def run_enrichment():
-        from enrichment.pipeline import enrich_list
-        with app.app_context():
-            enrich_list(list_id)
-
-    thread = threading.Thread(target=run_enrichment, daemon=True)
-    thread.start()
+    db = get_db()
+    db.execute("UPDATE lists SET enrichment_status = 'queued' WHERE id = ?", (list_id,))
+    jobs.enqueue(db, "enrich", list_id, {"revalidate": revalidate})
 
-    flash("Enrichment started. Progress will update automatically.", "info")
+    flash("Enrichment queued. Progress will update automatically.", "info")
     return redirect(url_for("lists.detail", list_id=list_id))
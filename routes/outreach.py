@@ -1,6 +1,5 @@
-import json
 from flask import Blueprint, render_template, request, redirect, url_for, flash
-from models import get_db, query_db
+from models import bump_stats_version, format_money, get_db, query_db
 
 bp = Blueprint("outreach", __name__)
 
@@ -39,33 +38,35 @@ def start():
         flash("Invalid platform", "error")
         return redirect(url_for("outreach.setup"))
 
-    # Get leads in this list that have the selected platform AND haven't been contacted yet
-    leads = query_db(
-        f"""SELECT l.id FROM leads l
+    db = get_db()
+    cur = db.execute(
+        """INSERT INTO outreach_sessions (list_id, flyer_id, template_id, platform, current_index, status)
+           VALUES (?, ?, ?, ?, 0, 'active')""",
+        (list_id, flyer_id, template_id, platform),
+    )
+    session_id = cur.lastrowid
+
+    # Queue the leads in this list that have the selected platform AND haven't been contacted yet
+    lead_count = db.execute(
+        f"""INSERT INTO outreach_queue (session_id, position, lead_id)
+            SELECT ?, ROW_NUMBER() OVER (ORDER BY l.rank_num, l.id) - 1, l.id FROM leads l
             JOIN list_leads ll ON l.id = ll.lead_id
             WHERE ll.list_id = ?
             AND l.{col} != '' AND l.{col} IS NOT NULL
-            AND l.id NOT IN (
-                SELECT lead_id FROM outreach_logs
-                WHERE platform = ? AND result = 'sent'
-            )
-            ORDER BY CAST(l.rank AS INTEGER)""",
-        (list_id, platform),
-    )
-
-    if not leads:
+            AND NOT EXISTS (
+                SELECT 1 FROM lead_contacts lc
+                WHERE lc.lead_id = l.id AND lc.platform = ? AND lc.sent > 0
+            )""",
+        (session_id, list_id, platform),
+    ).rowcount
+
+    if not lead_count:
+        db.rollback()
         flash("No eligible leads found for this list/platform combination", "warning")
         return redirect(url_for("outreach.setup"))
 
-    lead_queue = [row["id"] for row in leads]
-
-    db = get_db()
-    cur = db.execute(
-        """INSERT INTO outreach_sessions (list_id, flyer_id, template_id, platform, lead_queue, current_index, status)
-           VALUES (?, ?, ?, ?, ?, 0, 'active')""",
-        (list_id, flyer_id, template_id, platform, json.dumps(lead_queue)),
-    )
-    session_id = cur.lastrowid
+    db.execute("UPDATE outreach_sessions SET lead_count = ? WHERE id = ?", (lead_count, session_id))
+    bump_stats_version(db)
     db.commit()
 
     return redirect(url_for("outreach.session", session_id=session_id))
@@ -78,14 +79,17 @@ def session(session_id):
         flash("Session not found", "error")
         return redirect(url_for("outreach.setup"))
 
-    lead_queue = json.loads(sess["lead_queue"])
     current_index = sess["current_index"]
 
-    if current_index >= len(lead_queue):
+    if current_index >= sess["lead_count"]:
         return redirect(url_for("outreach.summary", session_id=session_id))
 
-    lead_id = lead_queue[current_index]
-    lead = query_db("SELECT * FROM leads WHERE id = ?", (lead_id,), one=True)
+    lead = query_db(
+        """SELECT l.* FROM outreach_queue q JOIN leads l ON l.id = q.lead_id
+           WHERE q.session_id = ? AND q.position = ?""",
+        (session_id, current_index),
+        one=True,
+    )
 
     flyer = None
     if sess["flyer_id"]:
@@ -105,7 +109,7 @@ def session(session_id):
                 .replace("{company}", lead["company"] or "")
                 .replace("{city}", lead["city"] or "")
                 .replace("{rank}", str(lead["rank"] or ""))
-                .replace("{volume}", lead["volume"] or "")
+                .replace("{volume}", format_money(lead["volume_amount"]) or lead["volume"] or "")
             )
 
     platform = sess["platform"]
@@ -119,7 +123,7 @@ def session(session_id):
         flyer=flyer,
         profile_url=profile_url,
         current=current_index + 1,
-        total=len(lead_queue),
+        total=sess["lead_count"],
         platform=platform,
         template=template,
         rendered_message=rendered_message,
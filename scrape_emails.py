@@ -3,39 +3,32 @@ Phase 2.5: Scrape company websites for email addresses.
 
 Three extraction methods per company website:
 1. mailto: links in HTML (highest confidence)
-2. Crawl /contact or /about page if no mailto on homepage
+2. Crawl contact-like pages linked from the homepage's navigation (falling
+   back to /contact, /about, ...) when the homepage has no good email
 3. Regex email extraction from raw HTML (filtered against junk domains)
 
 For companies with NO website: DuckDuckGo search for email contact info.
 
-Saves progress to a JSON cache so it can be resumed if interrupted.
+Saves each result to the on-disk cache store so it can be resumed if interrupted.
 """
 
 import csv
-import json
 import re
-import time
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse, urljoin
 
-import requests
-from bs4 import BeautifulSoup
+import config
+from enrichment import sessions
+from enrichment.cache import open_cache
+from enrichment.domains import DomainMatcher, load_filter
+from enrichment.extract import scan_page
+from enrichment.fetcher import FetchEngine, host_of
+from enrichment.search import get_client
 
 INPUT_CSV = "TX-NON-Qm-Lending-Brokers-Final.csv"
 OUTPUT_CSV = "TX-NON-Qm-Lending-Brokers-Final.csv"  # Update in place
-EMAIL_CACHE_FILE = "email_cache.json"
-
-REQUEST_TIMEOUT = 10  # seconds
-SCRAPE_DELAY = 1.0  # seconds between requests
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-}
+CACHE_NAMESPACE = "emails"
 
 # Email regex: standard local@domain.tld pattern
 EMAIL_REGEX = re.compile(
@@ -63,6 +56,7 @@ JUNK_DOMAINS = {
     "squarespace.com", "shopify.com", "hubspot.com",
     "mailchimp.com", "constantcontact.com",
 }
+JUNK_MATCHER = DomainMatcher(load_filter("junk_email_domains.txt", JUNK_DOMAINS))
 
 # Junk email prefixes (generic/noreply addresses to deprioritize)
 JUNK_PREFIXES = {
@@ -72,20 +66,26 @@ JUNK_PREFIXES = {
     "abuse", "spam", "security",
 }
 
-# Subpages to crawl if homepage has no emails
+# Subpages to guess if the homepage doesn't link to enough contact-like pages
 CONTACT_PATHS = ["/contact", "/contact-us", "/about", "/about-us"]
 
+# Words in a link's path that suggest a contact page, and how strongly
+CONTACT_LINK_WORDS = {
+    "contact": 10, "get-in-touch": 9, "reach-us": 8,
+    "about": 6, "team": 5, "staff": 5, "loan-officer": 5, "our-people": 5,
+    "locations": 4, "office": 4, "connect": 4,
+}
+
+# Links that can't be a contact page
+NON_PAGE_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".doc", ".docx")
 
-def load_cache() -> dict:
-    if Path(EMAIL_CACHE_FILE).exists():
-        with open(EMAIL_CACHE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# An email scoring this high (see score_email) ends the contact crawl
+GOOD_EMAIL_SCORE = 8
 
 
-def save_cache(cache: dict):
-    with open(EMAIL_CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+def load_cache():
+    """Open the target -> emails cache (a dict-like CacheStore)."""
+    return open_cache(CACHE_NAMESPACE)
 
 
 def is_junk_email(email: str) -> bool:
@@ -94,9 +94,8 @@ def is_junk_email(email: str) -> bool:
     local, _, domain = email_lower.partition("@")
 
     # Filter junk domains (exact match or subdomain match)
-    for junk in JUNK_DOMAINS:
-        if domain == junk or domain.endswith("." + junk):
-            return True
+    if domain in JUNK_MATCHER:
+        return True
 
     # Filter image/file extensions mistaken as emails
     if domain.endswith((".png", ".jpg", ".jpeg", ".gif", ".svg", ".css", ".js")):
@@ -124,91 +123,169 @@ def score_email(email: str) -> int:
     return 5
 
 
+def download(url: str) -> str:
+    """Fetch a URL's HTML (size-capped, streamed) through the shared pool.
+
+    Returns "" for non-HTML responses; raises on failure.
+    """
+    return sessions.fetch_html(url)
+
+
 def fetch_page(url: str) -> str:
-    """Fetch a URL and return its HTML text."""
+    """Fetch a URL and return its HTML text, or "" on failure."""
     try:
-        resp = requests.get(
-            url,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT,
-            allow_redirects=True,
-            verify=False,
-        )
-        resp.raise_for_status()
-        return resp.text
+        return download(url)
     except Exception as e:
         return ""
 
 
 def extract_emails_from_html(html: str) -> list:
     """Extract email addresses from HTML using multiple methods."""
-    emails = set()
-
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Method 1: mailto: links (highest confidence)
-    for tag in soup.find_all("a", href=True):
-        href = tag["href"]
-        if href.lower().startswith("mailto:"):
-            raw = href[7:].split("?")[0].strip()
-            if EMAIL_REGEX.match(raw):
-                emails.add(raw.lower())
+    return extract_emails_from_scan(scan_page(html))
+
+
+def extract_emails_from_scan(scan) -> list:
+    """Extract email addresses from a scanned page (see enrichment.extract).
+
+    The scan holds both mailto: link targets (highest confidence) and
+    addresses matched anywhere in the raw HTML; junk is filtered here.
+    """
+    return [e for e in scan.emails if not is_junk_email(e)]
+
+
+def has_good_email(emails: list) -> bool:
+    """True if any email scores GOOD_EMAIL_SCORE or better."""
+    return any(score_email(e) >= GOOD_EMAIL_SCORE for e in emails)
+
+
+def score_contact_link(path: str) -> int:
+    """Score a same-site link path for how likely it is a contact page."""
+    path = path.lower().rstrip("/")
+    if not path or path.endswith(NON_PAGE_EXTENSIONS):
+        return 0
+    score = max((w for word, w in CONTACT_LINK_WORDS.items() if word in path), default=0)
+    # Prefer top-level pages (/contact) over deep ones (/blog/2019/contact-...)
+    return max(score - 3 * (path.count("/") - 1), 1) if score else 0
+
+
+def contact_candidates(url: str, hrefs=()) -> list:
+    """Rank the homepage's same-site links that look like contact pages.
+
+    Up to config.CONTACT_MAX_PAGES URLs, best first. The usual CONTACT_PATHS
+    are guessed, after every linked page, when the navigation doesn't offer
+    enough.
+    """
+    base = url.rstrip("/") + "/"
+    base_path = urlparse(base).path
+    site = host_of(url)
+    scored = {}
+    for href in hrefs:
+        link = urljoin(base, href.strip()).split("#")[0].rstrip("/")
+        parsed = urlparse(link)
+        if parsed.scheme not in ("http", "https") or host_of(link) != site:
+            continue
+        # Depth counts from the homepage, which may not be the host's root
+        path = parsed.path
+        if path.startswith(base_path):
+            path = "/" + path[len(base_path):]
+        score = score_contact_link(path)
+        if score:
+            scored[link] = max(score, scored.get(link, 0))
+    ranked = sorted(scored, key=scored.get, reverse=True)
+    for path in CONTACT_PATHS:
+        link = urljoin(base, path.lstrip("/"))
+        if link not in scored:
+            ranked.append(link)
+    return ranked[:config.CONTACT_MAX_PAGES]
+
+
+def crawl_contact_pages(url: str, hrefs=()) -> list:
+    """Fetch the best contact-like subpages concurrently and collect emails.
+
+    hrefs are the homepage's links (see enrichment.extract.scan_page). At
+    most config.CONTACT_PER_HOST subpages are in flight at once; the
+    FetchEngine task calling this holds the site's host slot, so no other
+    task fetches from the site meanwhile. Stops as soon as a page yields an
+    email scoring GOOD_EMAIL_SCORE or better; subpages not yet started are
+    then skipped.
+    """
+    emails = []
+    pool = ThreadPoolExecutor(max_workers=config.CONTACT_PER_HOST)
+    try:
+        futures = [pool.submit(fetch_page, link) for link in contact_candidates(url, hrefs)]
+        for future in as_completed(futures):
+            sub_html = future.result()
+            if not sub_html:
+                continue
+            found = extract_emails_from_html(sub_html)
+            emails.extend(found)
+            if has_good_email(found):
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return emails
 
-    # Method 2: Regex on raw HTML
-    for match in EMAIL_REGEX.findall(html):
-        emails.add(match.lower())
 
-    # Filter junk
-    valid = [e for e in emails if not is_junk_email(e)]
-    return valid
+def rank_emails(emails: list) -> list:
+    """Deduplicate and sort emails by relevance."""
+    unique = list(set(emails))
+    unique.sort(key=score_email, reverse=True)
+    return unique
 
 
 def scrape_emails_from_website(url: str) -> list:
-    """Scrape a company website for email addresses."""
-    all_emails = []
+    """Scrape a company website for email addresses.
 
+    Raises if the homepage itself can't be fetched, so callers can tell a
+    failed lookup from a site that has no email.
+    """
     # Step 1: Scrape homepage
-    html = fetch_page(url)
-    if html:
-        all_emails.extend(extract_emails_from_html(html))
-
-    # Step 2: If no emails found, try contact/about pages
-    if not all_emails and html:
-        for path in CONTACT_PATHS:
-            subpage_url = urljoin(url.rstrip("/") + "/", path.lstrip("/"))
-            sub_html = fetch_page(subpage_url)
-            if sub_html:
-                all_emails.extend(extract_emails_from_html(sub_html))
-            if all_emails:
-                break
-            time.sleep(0.5)
+    html = download(url)
+    if not html:
+        return []
+    scan = scan_page(html)
+    all_emails = extract_emails_from_scan(scan)
 
-    # Deduplicate and sort by relevance
-    unique = list(set(all_emails))
-    unique.sort(key=score_email, reverse=True)
-    return unique
+    # Step 2: No good email yet - crawl the contact-like pages it links to
+    if not has_good_email(all_emails):
+        all_emails.extend(crawl_contact_pages(url, scan.hrefs))
+
+    return rank_emails(all_emails)
 
 
 def search_email_for_company(company_name: str) -> list:
-    """DuckDuckGo search for company email when no website exists."""
-    try:
-        from ddgs import DDGS
+    """DuckDuckGo search for company email when no website exists.
 
-        query = f'"{company_name}" mortgage email contact Texas'
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=5))
+    Raises if the search itself failed.
+    """
+    query = f'"{company_name}" mortgage email contact Texas'
+    results = get_client().text(query, max_results=5)
 
-        emails = set()
-        for r in results:
-            body = r.get("body", "") + " " + r.get("title", "")
-            for match in EMAIL_REGEX.findall(body):
-                if not is_junk_email(match.lower()):
-                    emails.add(match.lower())
+    emails = set()
+    for r in results:
+        body = r.get("body", "") + " " + r.get("title", "")
+        for match in EMAIL_REGEX.findall(body):
+            if not is_junk_email(match.lower()):
+                emails.add(match.lower())
 
-        return list(emails)
-    except Exception as e:
-        print(f"  ERROR searching '{company_name}': {e}")
-        return []
+    return list(emails)
+
+
+def find_emails(target: dict) -> list:
+    """Scrape the target's website, or search for it when it has none."""
+    if target["website"]:
+        return scrape_emails_from_website(target["website"])
+    return search_email_for_company(target["company"])
+
+
+def target_host(target: dict) -> str:
+    """Politeness key for a find_emails() target.
+
+    Searches get a key of their own: the shared search client paces them.
+    """
+    if target["website"]:
+        return host_of(target["website"])
+    return f"search:{target['company']}"
 
 
 def main():
@@ -217,7 +294,7 @@ def main():
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     cache = load_cache()
-    print(f"Loaded email cache with {len(cache)} entries")
+    print(f"Opened email cache with {len(cache)} entries")
 
     # Read CSV
     with open(INPUT_CSV, "r", encoding="utf-8-sig") as f:
@@ -237,24 +314,32 @@ def main():
         if key not in seen:
             seen[key] = {"website": website, "company": company}
 
-    remaining = {k: v for k, v in seen.items() if k not in cache}
+    # Re-scrape anything missing, expired, or that failed last time
+    remaining = {k: v for k, v in seen.items() if cache.needs_refresh(k, retry_errors=True)}
 
     print(f"Total unique targets: {len(seen)}")
-    print(f"Already cached: {len(seen) - len(remaining)}")
+    print(f"Fresh in cache: {len(seen) - len(remaining)}")
     print(f"Remaining to scrape: {len(remaining)}")
     print()
 
-    for i, (key, info) in enumerate(remaining.items(), 1):
+    # Fetch concurrently; per-domain politeness replaces the global sleep.
+    # No-website searches are paced by the shared search client instead.
+    engine = FetchEngine()
+    results = engine.run(find_emails, remaining.values(), key=target_host)
+    for i, (info, emails) in enumerate(results, 1):
         website = info["website"]
         company = info["company"]
+        key = website if website else f"__no_website__{company}"
 
         if website:
-            print(f"[{i}/{len(remaining)}] Scraping: {website}")
-            emails = scrape_emails_from_website(website)
+            print(f"[{i}/{len(remaining)}] Scraped: {website}")
         else:
-            print(f"[{i}/{len(remaining)}] Searching (no website): {company}")
-            emails = search_email_for_company(company)
+            print(f"[{i}/{len(remaining)}] Searched (no website): {company}")
 
+        if emails is None:
+            cache.set_error(key, default=[])
+            print("  (fetch failed, will retry)")
+            continue
         cache[key] = emails
 
         if emails:
@@ -263,13 +348,6 @@ def main():
         else:
             print("  (no emails found)")
 
-        if i % 10 == 0:
-            save_cache(cache)
-            print(f"  (cache saved: {len(cache)} entries)")
-
-        time.sleep(SCRAPE_DELAY)
-
-    save_cache(cache)
     print(f"\nAll scraping complete. Cache has {len(cache)} entries.")
 
     # Update CSV with Email column
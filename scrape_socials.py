@@ -5,34 +5,22 @@ Visits each company URL from the enriched CSV, parses the page HTML
 for social media links (Facebook, LinkedIn, Instagram, X/Twitter, YouTube, TikTok),
 and writes results to a final enriched CSV.
 
-Saves progress to a JSON cache so it can be resumed if interrupted.
+Saves each result to the on-disk cache store so it can be resumed if interrupted.
 """
 
 import csv
-import json
 import re
-import time
-import sys
-from pathlib import Path
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
+from enrichment import sessions
+from enrichment.cache import open_cache
+from enrichment.domains import DomainMatcher, UrlMatcher, load_filter, url_host
+from enrichment.extract import scan_page
+from enrichment.fetcher import FetchEngine
 
 INPUT_CSV = "TX-NON-Qm-Lending-Brokers-Enriched.csv"
 OUTPUT_CSV = "TX-NON-Qm-Lending-Brokers-Final.csv"
-SOCIAL_CACHE_FILE = "social_cache.json"
-
-REQUEST_TIMEOUT = 10  # seconds
-SCRAPE_DELAY = 1.0  # seconds between requests
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-}
+CACHE_NAMESPACE = "socials"
 
 # Social media platform patterns
 SOCIAL_PATTERNS = {
@@ -77,18 +65,20 @@ SKIP_PATTERNS = [
     "facebook.com/tr",  # tracking pixel
     "facebook.com/plugins",
 ]
+SKIP_MATCHER = UrlMatcher(load_filter("skip_social_urls.txt", SKIP_PATTERNS))
 
-
-def load_cache() -> dict:
-    if Path(SOCIAL_CACHE_FILE).exists():
-        with open(SOCIAL_CACHE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# Social domain -> platform, for classifying links by host
+PLATFORM_BY_DOMAIN = {
+    domain: platform
+    for platform, pattern in SOCIAL_PATTERNS.items()
+    for domain in pattern["domains"]
+}
+SOCIAL_DOMAINS = DomainMatcher(PLATFORM_BY_DOMAIN)
 
 
-def save_cache(cache: dict):
-    with open(SOCIAL_CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2)
+def load_cache():
+    """Open the URL -> social links cache (a dict-like CacheStore)."""
+    return open_cache(CACHE_NAMESPACE)
 
 
 def clean_url(url: str) -> str:
@@ -101,63 +91,41 @@ def clean_url(url: str) -> str:
 
 def is_skip_url(url: str) -> bool:
     """Check if URL is a share/intent link rather than a real profile."""
-    url_lower = url.lower()
-    return any(skip in url_lower for skip in SKIP_PATTERNS)
+    return SKIP_MATCHER.match(url)
 
 
 def extract_socials_from_html(html: str, base_url: str) -> dict:
     """Extract social media URLs from page HTML."""
-    results = {}
+    return extract_socials_from_scan(scan_page(html), base_url)
 
-    soup = BeautifulSoup(html, "html.parser")
 
-    # Method 1: Find all <a> tags with href
-    all_links = set()
-    for tag in soup.find_all("a", href=True):
-        href = tag["href"]
-        # Handle relative URLs
-        if href.startswith("/"):
-            href = urljoin(base_url, href)
-        all_links.add(href)
+def extract_socials_from_scan(scan, base_url: str) -> dict:
+    """Extract social media URLs from a scanned page (see enrichment.extract)."""
+    results = {}
+
+    # Method 1: <a> hrefs (relative URLs resolved against the page)
+    all_links = [urljoin(base_url, href) if href.startswith("/") else href for href in scan.hrefs]
 
-    # Method 2: Also regex the raw HTML for social URLs that might be in
-    # JavaScript, data attributes, etc.
-    for platform, config in SOCIAL_PATTERNS.items():
-        matches = re.findall(config["regex"], html, re.IGNORECASE)
-        all_links.update(matches)
+    # Method 2: social URLs found anywhere in the raw HTML - JavaScript,
+    # data attributes, etc.
+    all_links.extend(scan.socials)
 
-    # Now classify all collected links
+    # Now classify all collected links, first match per platform wins
     for link in all_links:
-        if is_skip_url(link):
+        domain = SOCIAL_DOMAINS.match(url_host(link))
+        if domain is None:
             continue
-
-        link_lower = link.lower()
-        for platform, config in SOCIAL_PATTERNS.items():
-            if platform in results:
-                continue  # Already found this platform
-            for domain in config["domains"]:
-                if domain in link_lower:
-                    results[platform] = clean_url(link)
-                    break
+        platform = PLATFORM_BY_DOMAIN[domain]
+        if platform in results or is_skip_url(link):
+            continue  # Already found this platform, or a share link
+        results[platform] = clean_url(link)
 
     return results
 
 
 def scrape_website(url: str) -> dict:
-    """Fetch a URL and extract social media links."""
-    try:
-        resp = requests.get(
-            url,
-            headers=HEADERS,
-            timeout=REQUEST_TIMEOUT,
-            allow_redirects=True,
-            verify=False,  # Some mortgage sites have bad certs
-        )
-        resp.raise_for_status()
-        return extract_socials_from_html(resp.text, url)
-    except Exception as e:
-        print(f"  ERROR: {e}")
-        return {}
+    """Fetch a URL and extract social media links. Raises on fetch failure."""
+    return extract_socials_from_html(sessions.fetch_html(url), url)
 
 
 def main():
@@ -166,7 +134,7 @@ def main():
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
     cache = load_cache()
-    print(f"Loaded social cache with {len(cache)} entries")
+    print(f"Opened social cache with {len(cache)} entries")
 
     # Read enriched CSV
     with open(INPUT_CSV, "r", encoding="utf-8-sig") as f:
@@ -181,16 +149,21 @@ def main():
         if len(row) > url_col_idx and row[url_col_idx]
     ))
 
-    remaining = [u for u in unique_urls if u not in cache]
+    # Re-scrape anything missing, expired, or that failed last time
+    remaining = [u for u in unique_urls if cache.needs_refresh(u, retry_errors=True)]
 
     print(f"Total unique URLs: {len(unique_urls)}")
-    print(f"Already cached: {len(unique_urls) - len(remaining)}")
+    print(f"Fresh in cache: {len(unique_urls) - len(remaining)}")
     print(f"Remaining to scrape: {len(remaining)}")
     print()
 
-    for i, url in enumerate(remaining, 1):
-        print(f"[{i}/{len(remaining)}] Scraping: {url}")
-        socials = scrape_website(url)
+    # Fetch concurrently; per-domain politeness replaces the global sleep
+    engine = FetchEngine()
+    for i, (url, socials) in enumerate(engine.run(scrape_website, remaining), 1):
+        print(f"[{i}/{len(remaining)}] Scraped: {url}")
+        if socials is None:
+            cache.set_error(url, default={})
+            continue
         cache[url] = socials
 
         if socials:
@@ -199,13 +172,6 @@ def main():
         else:
             print("  (no social links found)")
 
-        if i % 10 == 0:
-            save_cache(cache)
-            print(f"  (cache saved: {len(cache)} entries)")
-
-        time.sleep(SCRAPE_DELAY)
-
-    save_cache(cache)
     print(f"\nAll scraping complete. Cache has {len(cache)} entries.")
 
     # Write final CSV